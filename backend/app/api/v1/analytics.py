@@ -10,8 +10,9 @@ from datetime import datetime, timedelta
 from uuid import UUID
 import logging
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.property import Property
+from app.models.region import RegionAggregate
 from app.models.saved_search import SavedSearch, SearchAlert
 from app.models.google_ads import GoogleAdsAccount, CustomerMatchAudience
 from app.models.territory import Territory
@@ -28,17 +29,17 @@ async def get_current_user_id() -> UUID:
 
 @router.get("/dashboard")
 async def get_dashboard_analytics(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     user_id: UUID = Depends(get_current_user_id),
 ):
     """
     Get comprehensive dashboard analytics across all features
     """
     try:
-        # Property Statistics
-        total_properties_query = select(func.count(Property.id))
+        # Property Statistics (total from the region aggregates, not a scan of every partition)
+        total_properties_query = select(func.sum(RegionAggregate.property_count))
         total_properties = await db.execute(total_properties_query)
-        total_properties_count = total_properties.scalar()
+        total_properties_count = total_properties.scalar() or 0
 
         # Recent properties (last 7 days)
         week_ago = datetime.utcnow() - timedelta(days=7)
@@ -30,7 +30,7 @@ async def bulk_import_properties(
     Expected columns:
     - address (required)
     - city
-    - state
+    - state (required, two-letter code)
     - zip_code
     - latitude (required)
     - longitude (required)
@@ -59,7 +59,7 @@ async def bulk_import_properties(
         total_rows = len(df)
 
         # Validate required columns
-        required_cols = ['address', 'latitude', 'longitude']
+        required_cols = ['address', 'state', 'latitude', 'longitude']
         missing_cols = [col for col in required_cols if col not in df.columns]
         if missing_cols:
             raise HTTPException(
@@ -71,7 +71,7 @@ async def bulk_import_properties(
         for idx, row in df.iterrows():
             try:
                 # Validate data
-                if pd.isna(row['address']) or pd.isna(row['latitude']) or pd.isna(row['longitude']):
+                if any(pd.isna(row[col]) for col in required_cols):
                     errors.append({
                         "row": idx + 2,  # +2 for header and 0-index
                         "error": "Missing required fields",
@@ -90,8 +90,8 @@ async def bulk_import_properties(
                 property = Property(
                     address=str(row['address']),
                     city=str(row['city']) if 'city' in row and not pd.isna(row['city']) else None,
-                    state=str(row['state']) if 'state' in row and not pd.isna(row['state']) else None,
-                    zip_code=str(row['zip_code']) if 'zip_code' in row and not pd.isna(row['zip_code']) else None,
+                    state=str(row['state']).strip().upper(),  # Partition key
+                    zip=str(row['zip_code']) if 'zip_code' in row and not pd.isna(row['zip_code']) else None,
                     latitude=float(row['latitude']),
                     longitude=float(row['longitude']),
                     property_type=property_type,
@@ -1,24 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import joinedload
-from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+from typing import Optional
 from uuid import UUID
-import json
 
-from app.core.database import get_db
-from app.core.cache import cache
+from app.core.database import cancel_on_disconnect, get_db, get_read_db
+from app.core.cache import cache, MISSING
+from app.core.bloom import property_filter
 from app.core.config import settings
-from app.models.property import Property, RoofIQAnalysis, SolarFitAnalysis, DrivewayProAnalysis, PermitScopeAnalysis
+from app.models.property import Property, RoofIQAnalysis, SolarFitAnalysis
 from app.schemas.property import PropertyFilters, PropertyResponse, PropertySearchResponse, RoofIQData, SolarFitData
+from app.services.property_search import INCLUDE_COLUMNS, property_search_service
 
 router = APIRouter(prefix="/properties", tags=["properties"])
 
 
+def _json_response(body: str | bytes) -> Response:
+    """Wrap an already-encoded JSON body so FastAPI skips response_model serialization"""
+    return Response(content=body, media_type="application/json")
+
+
+async def _not_found(cache_key: str, detail: str) -> HTTPException:
+    """Remember a miss briefly so repeated lookups for it skip the database"""
+    await cache.backfill([(cache_key, MISSING, settings.CACHE_NEGATIVE_TTL)])
+    return HTTPException(status_code=404, detail=detail)
+
+
+async def _cached_lookup(cache_key: str, property_id: UUID, detail: str) -> Optional[Response]:
+    """
+    Serve a per-property lookup from cache.
+
+    Returns the cached body, raises 404 for remembered misses and ids the
+    property filter rules out, or returns None when the database must be asked.
+    Filter misses aren't remembered: the filter can briefly lack a new id
+    while it is rebuilt, and its next answer must not be masked by the cache.
+    """
+    cached_body = await cache.get_raw(cache_key)
+    if cached_body == MISSING:
+        raise HTTPException(status_code=404, detail=detail)
+    if cached_body is not None:
+        return _json_response(cached_body)
+
+    if not await property_filter.might_contain(str(property_id)):
+        raise HTTPException(status_code=404, detail=detail)
+
+    return None
+
+
 @router.post("/search", response_model=PropertySearchResponse)
 async def search_properties(
     filters: PropertyFilters,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Search properties with advanced filtering.
@@ -30,140 +64,13 @@ async def search_properties(
     - Solar potential score
     - Construction permits
     - And more...
-    """
-
-    # Generate cache key
-    cache_key = cache.generate_cache_key("property_search", **filters.dict())
-
-    # Try to get from cache
-    cached_result = await cache.get(cache_key)
-    if cached_result:
-        return PropertySearchResponse(**cached_result)
-
-    # Build query
-    query = select(Property).options(
-        joinedload(Property.roofiq),
-        joinedload(Property.solarfit),
-        joinedload(Property.drivewaypro),
-        joinedload(Property.permitscope)
-    )
-
-    conditions = []
-
-    # Location filters
-    if filters.city:
-        conditions.append(Property.city.ilike(f"%{filters.city}%"))
-
-    if filters.state:
-        conditions.append(Property.state == filters.state.upper())
-
-    if filters.zip:
-        conditions.append(Property.zip == filters.zip)
-
-    if filters.county:
-        conditions.append(Property.county.ilike(f"%{filters.county}%"))
-
-    if filters.bounds:
-        # Bounding box filter
-        west, south, east, north = filters.bounds
-        conditions.append(and_(
-            Property.longitude >= west,
-            Property.longitude <= east,
-            Property.latitude >= south,
-            Property.latitude <= north
-        ))
-
-    # Property type filter
-    if filters.property_type:
-        conditions.append(Property.property_type == filters.property_type)
 
-    # RoofIQ filters (requires join)
-    roof_conditions = []
-    if filters.roof_condition:
-        roof_conditions.append(RoofIQAnalysis.condition.in_(filters.roof_condition))
-
-    if filters.roof_age_years_max:
-        roof_conditions.append(RoofIQAnalysis.age_years <= filters.roof_age_years_max)
-
-    if filters.roof_age_years_min:
-        roof_conditions.append(RoofIQAnalysis.age_years >= filters.roof_age_years_min)
-
-    if filters.roof_material:
-        roof_conditions.append(RoofIQAnalysis.material.in_(filters.roof_material))
-
-    if roof_conditions:
-        query = query.join(RoofIQAnalysis)
-        conditions.extend(roof_conditions)
-
-    # SolarFit filters
-    solar_conditions = []
-    if filters.solar_score_min is not None:
-        solar_conditions.append(SolarFitAnalysis.score >= filters.solar_score_min)
-
-    if filters.solar_score_max is not None:
-        solar_conditions.append(SolarFitAnalysis.score <= filters.solar_score_max)
-
-    if filters.panel_count_min:
-        solar_conditions.append(SolarFitAnalysis.panel_count >= filters.panel_count_min)
-
-    if filters.roi_years_max:
-        solar_conditions.append(SolarFitAnalysis.roi_years <= filters.roi_years_max)
-
-    if solar_conditions:
-        query = query.join(SolarFitAnalysis)
-        conditions.extend(solar_conditions)
-
-    # Apply all conditions
-    if conditions:
-        query = query.where(and_(*conditions))
-
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    result = await db.execute(count_query)
-    total = result.scalar_one()
-
-    # Apply sorting
-    if filters.sort_by == 'solar_score':
-        query = query.join(SolarFitAnalysis) if not solar_conditions else query
-        order_col = SolarFitAnalysis.score
-    elif filters.sort_by == 'roof_age':
-        query = query.join(RoofIQAnalysis) if not roof_conditions else query
-        order_col = RoofIQAnalysis.age_years
-    else:
-        order_col = Property.updated_at
-
-    if filters.sort_order == 'desc':
-        query = query.order_by(order_col.desc())
-    else:
-        query = query.order_by(order_col.asc())
-
-    # Apply pagination
-    query = query.limit(filters.limit).offset(filters.offset)
-
-    # Execute query
-    result = await db.execute(query)
-    properties = result.unique().scalars().all()
-
-    # Calculate center point
-    center = None
-    if properties:
-        avg_lat = sum(float(p.latitude) for p in properties) / len(properties)
-        avg_lng = sum(float(p.longitude) for p in properties) / len(properties)
-        center = [avg_lng, avg_lat]
-
-    # Build response
-    response_data = {
-        "properties": properties,
-        "total": total,
-        "limit": filters.limit,
-        "offset": filters.offset,
-        "center": center
-    }
-
-    # Cache result
-    await cache.set(cache_key, response_data, settings.CACHE_PROPERTY_SEARCH_TTL)
-
-    return PropertySearchResponse(**response_data)
+    Results leave out the wide panel_layout and recent_permits fields unless
+    they are listed in include.
+    """
+    await property_search_service.record_search(filters)
+    body = await cancel_on_disconnect(request, property_search_service.search(db, filters))
+    return _json_response(body)
 
 
 @router.get("/{property_id}", response_model=PropertyResponse)
@@ -175,29 +82,34 @@ async def get_property(
 
     # Try cache first
     cache_key = f"property:{property_id}"
-    cached_property = await cache.get(cache_key)
-    if cached_property:
-        return PropertyResponse(**cached_property)
+    cached = await _cached_lookup(cache_key, property_id, "Property not found")
+    if cached is not None:
+        return cached
 
-    # Query database
+    # Query database (the detail view includes every wide analysis field)
     query = select(Property).where(Property.id == property_id).options(
-        joinedload(Property.roofiq),
-        joinedload(Property.solarfit),
-        joinedload(Property.drivewaypro),
-        joinedload(Property.permitscope)
+        *property_search_service.property_options(INCLUDE_COLUMNS)
     )
 
     result = await db.execute(query)
     property_obj = result.unique().scalar_one_or_none()
 
     if not property_obj:
-        raise HTTPException(status_code=404, detail="Property not found")
+        raise await _not_found(cache_key, "Property not found")
 
-    # Cache result
-    property_dict = PropertyResponse.from_orm(property_obj).dict()
-    await cache.set(cache_key, property_dict, settings.CACHE_PROPERTY_DETAIL_TTL)
+    # Cache result, priming the per-product keys the detail view requests next
+    response = PropertyResponse.model_validate(property_obj)
+    body = response.model_dump_json()
 
-    return property_obj
+    entries = [(cache_key, body, settings.CACHE_PROPERTY_DETAIL_TTL)]
+    for product, data in (("roofiq", response.roofiq), ("solarfit", response.solarfit)):
+        if data:
+            entries.append((f"{product}:{property_id}", data.model_dump_json(), settings.CACHE_PRODUCT_ANALYSIS_TTL))
+        else:
+            entries.append((f"{product}:{property_id}", MISSING, settings.CACHE_NEGATIVE_TTL))
+    await cache.backfill(entries)
+
+    return _json_response(body)
 
 
 @router.get("/{property_id}/roofiq", response_model=RoofIQData)
@@ -208,21 +120,21 @@ async def get_roofiq_data(
     """Get RoofIQ analysis for a specific property"""
 
     cache_key = f"roofiq:{property_id}"
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return RoofIQData(**cached_data)
+    cached = await _cached_lookup(cache_key, property_id, "RoofIQ data not found")
+    if cached is not None:
+        return cached
 
     query = select(RoofIQAnalysis).where(RoofIQAnalysis.property_id == property_id)
     result = await db.execute(query)
     roofiq = result.scalar_one_or_none()
 
     if not roofiq:
-        raise HTTPException(status_code=404, detail="RoofIQ data not found")
+        raise await _not_found(cache_key, "RoofIQ data not found")
 
-    roofiq_dict = RoofIQData.from_orm(roofiq).dict()
-    await cache.set(cache_key, roofiq_dict, settings.CACHE_PRODUCT_ANALYSIS_TTL)
+    body = RoofIQData.model_validate(roofiq).model_dump_json()
+    await cache.backfill([(cache_key, body, settings.CACHE_PRODUCT_ANALYSIS_TTL)])
 
-    return roofiq
+    return _json_response(body)
 
 
 @router.get("/{property_id}/solarfit", response_model=SolarFitData)
@@ -233,18 +145,20 @@ async def get_solarfit_data(
     """Get SolarFit analysis for a specific property"""
 
     cache_key = f"solarfit:{property_id}"
-    cached_data = await cache.get(cache_key)
-    if cached_data:
-        return SolarFitData(**cached_data)
+    cached = await _cached_lookup(cache_key, property_id, "SolarFit data not found")
+    if cached is not None:
+        return cached
 
-    query = select(SolarFitAnalysis).where(SolarFitAnalysis.property_id == property_id)
+    query = select(SolarFitAnalysis).where(SolarFitAnalysis.property_id == property_id).options(
+        undefer(SolarFitAnalysis.panel_layout)
+    )
     result = await db.execute(query)
     solarfit = result.scalar_one_or_none()
 
     if not solarfit:
-        raise HTTPException(status_code=404, detail="SolarFit data not found")
+        raise await _not_found(cache_key, "SolarFit data not found")
 
-    solarfit_dict = SolarFitData.from_orm(solarfit).dict()
-    await cache.set(cache_key, solarfit_dict, settings.CACHE_PRODUCT_ANALYSIS_TTL)
+    body = SolarFitData.model_validate(solarfit).model_dump_json()
+    await cache.backfill([(cache_key, body, settings.CACHE_PRODUCT_ANALYSIS_TTL)])
 
-    return solarfit
+    return _json_response(body)
@@ -0,0 +1,138 @@
+"""
+Region API Endpoints
+
+Per-region property summaries for the dashboard, comparison and heatmap
+views, read from the precomputed region aggregates.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.core.database import get_read_db
+from app.models.region import RegionAggregate
+from app.schemas.region import (
+    PermitActivity,
+    RegionSummary,
+    RegionSummaryListResponse,
+    RoofConditionCounts,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/regions", tags=["regions"])
+
+# Columns each summary level groups region rows by
+LEVEL_COLUMNS = {
+    "state": ("state",),
+    "county": ("state", "county"),
+    "city": ("state", "city"),
+    "zip": ("state", "zip"),
+}
+
+# Summed columns of region_aggregates, rolled up per level
+SUM_COLUMNS = (
+    "property_count",
+    "solar_count",
+    "solar_score_sum",
+    "roof_excellent",
+    "roof_good",
+    "roof_fair",
+    "roof_poor",
+    "permit_count",
+    "total_permits",
+    "recent_permit_count",
+    "construction_activity_count",
+    "construction_activity_sum",
+)
+
+
+def _average(total: int, count: int) -> Optional[float]:
+    return round(total / count, 1) if count else None
+
+
+def _summary(row) -> RegionSummary:
+    return RegionSummary(
+        state=row.state,
+        county=getattr(row, "county", None) or None,
+        city=getattr(row, "city", None) or None,
+        zip=getattr(row, "zip", None) or None,
+        property_count=row.property_count,
+        solar_analyzed=row.solar_count,
+        avg_solar_score=_average(row.solar_score_sum, row.solar_count),
+        roof_condition=RoofConditionCounts(
+            excellent=row.roof_excellent,
+            good=row.roof_good,
+            fair=row.roof_fair,
+            poor=row.roof_poor,
+        ),
+        permits=PermitActivity(
+            properties_with_permits=row.permit_count,
+            total_permits=row.total_permits,
+            recent_permit_properties=row.recent_permit_count,
+            avg_construction_activity=_average(row.construction_activity_sum, row.construction_activity_count),
+        ),
+        refreshed_at=row.refreshed_at,
+    )
+
+
+@router.get("", response_model=RegionSummaryListResponse)
+async def list_region_summaries(
+    level: str = Query("city", pattern=r"^(state|county|city|zip)$"),
+    state: Optional[str] = None,
+    county: Optional[str] = None,
+    city: Optional[str] = None,
+    zip: Optional[str] = None,
+    sort_by: str = Query("property_count", pattern=r"^(property_count|avg_solar_score|recent_permits)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Summaries of the regions at a level (state, county, city or zip).
+
+    Counts, average solar score, roof condition distribution and permit
+    activity, rolled up from the precomputed region aggregates; filter by
+    state, county, city and zip (exact matches).
+    """
+    try:
+        group = [getattr(RegionAggregate, column) for column in LEVEL_COLUMNS[level]]
+        sums = {column: func.sum(getattr(RegionAggregate, column)) for column in SUM_COLUMNS}
+
+        query = (
+            select(
+                *group,
+                *(total.label(column) for column, total in sums.items()),
+                func.min(RegionAggregate.refreshed_at).label("refreshed_at"),
+            )
+            .group_by(*group)
+        )
+
+        if state:
+            query = query.where(RegionAggregate.state == state.upper())
+        if county:
+            query = query.where(RegionAggregate.county == county)
+        if city:
+            query = query.where(RegionAggregate.city == city)
+        if zip:
+            query = query.where(RegionAggregate.zip == zip)
+
+        # Get total count
+        count_query = select(func.count()).select_from(query.subquery())
+        total = (await db.execute(count_query)).scalar()
+
+        if sort_by == "avg_solar_score":
+            order = (sums["solar_score_sum"] / func.nullif(sums["solar_count"], 0)).desc().nulls_last()
+        elif sort_by == "recent_permits":
+            order = sums["recent_permit_count"].desc()
+        else:
+            order = sums["property_count"].desc()
+
+        result = await db.execute(query.order_by(order, *group).offset(skip).limit(limit))
+
+        return RegionSummaryListResponse(regions=[_summary(row) for row in result], total=total)
+
+    except Exception as e:
+        logger.error(f"Error listing region summaries: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to list region summaries")
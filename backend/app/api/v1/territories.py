@@ -5,7 +5,7 @@ REST API for territory drawing and management.
 """
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from geoalchemy2.functions import ST_AsGeoJSON, ST_GeomFromGeoJSON, ST_Contains, ST_Intersects
@@ -13,8 +13,8 @@ from datetime import datetime
 import json
 import logging
 
-from app.core.database import get_db
-from app.models.territory import Territory, SavedTerritoryGroup
+from app.core.database import cancel_on_disconnect, get_db, get_read_db
+from app.models.territory import Territory, SavedTerritoryGroup, TerritoryType
 from app.models.property import Property
 from app.schemas.territory import (
     TerritoryCreate,
@@ -108,20 +108,14 @@ async def list_territories(
         total_result = await db.execute(count_query)
         total = total_result.scalar()
 
-        # Get paginated results
-        query = query.offset(skip).limit(limit)
+        # Get paginated results with geometries as GeoJSON in the same query
+        query = query.add_columns(func.ST_AsGeoJSON(Territory.geometry)).offset(skip).limit(limit)
         result = await db.execute(query)
-        territories = result.scalars().all()
 
-        # Convert geometries to GeoJSON
         response_territories = []
-        for territory in territories:
-            geom_query = select(func.ST_AsGeoJSON(territory.geometry))
-            geom_result = await db.execute(geom_query)
-            geom_json = json.loads(geom_result.scalar())
-
+        for territory, geom_geojson in result:
             territory_response = TerritoryResponse.model_validate(territory)
-            territory_response.geometry = geom_json
+            territory_response.geometry = json.loads(geom_geojson)
             response_territories.append(territory_response)
 
         return TerritoryListResponse(territories=response_territories, total=total)
@@ -254,7 +248,9 @@ async def delete_territory(
 @router.get("/{territory_id}/properties/count", response_model=TerritoryPropertyCount)
 async def get_territory_property_count(
     territory_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
     user_id: UUID = Depends(get_current_user_id),
 ):
     """Get count of properties within a territory"""
@@ -269,11 +265,22 @@ async def get_territory_property_count(
         if not territory:
             raise HTTPException(status_code=404, detail="Territory not found")
 
-        # Count properties within territory
-        count_query = select(func.count(Property.id)).where(
-            func.ST_Contains(territory.geometry, Property.geometry)
+        # Count properties within territory (on a replica when available).
+        # Circles are matched by distance in meters from their center rather
+        # than against their polygon approximation.
+        is_circle = (
+            territory.territory_type == TerritoryType.CIRCLE
+            and territory.radius_meters
+            and territory.center_lat is not None
+            and territory.center_lng is not None
         )
-        count_result = await db.execute(count_query)
+        if is_circle:
+            center = func.ST_SetSRID(func.ST_MakePoint(territory.center_lng, territory.center_lat), 4326)
+            within = func.ST_DWithin(Property.location, func.geography(center), territory.radius_meters)
+        else:
+            within = func.ST_Contains(territory.geometry, Property.geometry)
+        count_query = select(func.count(Property.id)).where(within)
+        count_result = await cancel_on_disconnect(request, read_db.execute(count_query))
         count = count_result.scalar()
 
         # Update cached count
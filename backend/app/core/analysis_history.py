@@ -0,0 +1,126 @@
+"""
+Analysis History
+
+The analysis tables (RoofIQ, SolarFit, DrivewayPro, PermitScope) hold one row
+per property, its latest analysis, which searches and detail reads join. A
+session event appends a snapshot of every inserted or changed analysis row to
+analysis_history in the same flush, bumping the row's version, so history
+grows without touching the tables reads use.
+
+Store a new analysis with record_analysis(), which updates the property's
+latest row instead of adding a second one.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional, Type
+from uuid import UUID
+import enum
+import logging
+import uuid
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.property import (
+    AnalysisHistory,
+    RoofIQAnalysis,
+    SolarFitAnalysis,
+    DrivewayProAnalysis,
+    PermitScopeAnalysis,
+)
+
+logger = logging.getLogger(__name__)
+
+# Analysis models and their product names in analysis_history
+PRODUCTS = {
+    RoofIQAnalysis: "roofiq",
+    SolarFitAnalysis: "solarfit",
+    DrivewayProAnalysis: "drivewaypro",
+    PermitScopeAnalysis: "permitscope",
+}
+
+# Columns identifying the row rather than describing the analysis
+_KEY_COLUMNS = {"id", "property_id", "property_state", "version"}
+
+
+def _json_value(value: Any) -> Any:
+    """A column value as to_jsonb() renders the stored value"""
+    if isinstance(value, enum.Enum):
+        return value.name  # Enum columns store names
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def snapshot(analysis) -> dict:
+    """The analysis columns of a row, as stored in analysis_history.data"""
+    return {
+        attr.key: _json_value(getattr(analysis, attr.key))
+        for attr in inspect(analysis).mapper.column_attrs
+        if attr.key not in _KEY_COLUMNS
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _append_history(session: Session, flush_context, instances):
+    """Version and snapshot analysis rows inserted or changed in this flush"""
+    for analysis in (*session.new, *session.dirty):
+        product = PRODUCTS.get(type(analysis))
+        if product is None:
+            continue
+
+        if analysis in session.new:
+            # Column defaults are applied later in the flush; history needs them now
+            analysis.id = analysis.id or uuid.uuid4()
+            analysis.version = analysis.version or 1
+            analysis.analysis_date = analysis.analysis_date or datetime.utcnow()
+        elif session.is_modified(analysis, include_collections=False):
+            analysis.version += 1
+        else:
+            continue
+
+        session.add(AnalysisHistory(
+            property_id=analysis.property_id,
+            property_state=analysis.property_state,
+            product=product,
+            analysis_id=analysis.id,
+            version=analysis.version,
+            analysis_date=analysis.analysis_date,
+            data=snapshot(analysis),
+        ))
+
+
+async def record_analysis(
+    session: AsyncSession,
+    model: Type,
+    property_id: UUID,
+    property_state: str,
+    analysis_date: Optional[datetime] = None,
+    **values,
+):
+    """
+    Store a new analysis of a property as its latest.
+
+    Updates the property's existing row (locked, so concurrent re-analyses
+    take turns) or adds one; the version it replaces stays in
+    analysis_history. The caller commits.
+    """
+    result = await session.execute(
+        select(model)
+        .where(model.property_id == property_id, model.property_state == property_state)
+        .with_for_update()
+    )
+    analysis = result.scalar_one_or_none()
+    if analysis is None:
+        analysis = model(property_id=property_id, property_state=property_state)
+        session.add(analysis)
+
+    for key, value in values.items():
+        setattr(analysis, key, value)
+    analysis.analysis_date = analysis_date or datetime.utcnow()
+    return analysis
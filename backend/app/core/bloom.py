@@ -0,0 +1,87 @@
+"""
+Bloom Filter
+
+Redis-backed Bloom filter used to reject lookups for ids that cannot exist.
+"""
+import hashlib
+import math
+from typing import Iterable
+
+from app.core.cache import CacheService, cache
+from app.core.config import settings
+
+
+class BloomFilter:
+    """
+    Bloom filter stored as a Redis bitmap and shared by every API process.
+
+    A published filter has no false negatives for the ids it was built from
+    or later given via add(). Until a filter is published (or after it
+    expires) every id is treated as possibly present.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        error_rate: float,
+        cache_service: CacheService,
+        enabled: bool = True,
+    ):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.cache = cache_service
+        self.enabled = enabled
+        # Sizing is part of the key so a config change never reads an
+        # incompatible bitmap
+        self.key = f"{name}:bloom:{self.size}:{self.hash_count}"
+
+    def offsets(self, item: str) -> list[int]:
+        """Bit offsets for item (double hashing over one blake2b digest)"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def new_bitmap(self) -> bytearray:
+        """Empty bitmap for building a filter locally"""
+        return bytearray((self.size + 7) // 8)
+
+    def set_bits(self, bitmap: bytearray, item: str):
+        """Add item to a locally built bitmap"""
+        for offset in self.offsets(item):
+            # Redis bit order: offset 0 is the most significant bit of byte 0
+            bitmap[offset >> 3] |= 0x80 >> (offset & 7)
+
+    async def publish(self, bitmap: bytearray, ttl: int):
+        """Replace the shared filter with a locally built bitmap"""
+        await self.cache.set_raw(
+            self.key, bytes(bitmap), ttl, timeout=settings.CACHE_BULK_OPERATION_TIMEOUT
+        )
+
+    async def add(self, items: Iterable[str]):
+        """Add items to the published filter, e.g. after inserting rows"""
+        if not self.enabled:
+            return
+
+        offsets = [offset for item in items for offset in self.offsets(item)]
+        await self.cache.setbits_if_exists(self.key, offsets)
+
+    async def might_contain(self, item: str) -> bool:
+        """False only if item is definitely absent"""
+        if not self.enabled:
+            return True
+
+        bits = await self.cache.getbits(self.key, self.offsets(item))
+        return bits is None or all(bits)
+
+
+# Global filter of existing property ids
+property_filter = BloomFilter(
+    "property_ids",
+    capacity=settings.PROPERTY_BLOOM_CAPACITY,
+    error_rate=settings.PROPERTY_BLOOM_ERROR_RATE,
+    cache_service=cache,
+    enabled=settings.PROPERTY_BLOOM_ENABLED,
+)
@@ -1,63 +1,538 @@
 import redis.asyncio as redis
+from redis.exceptions import RedisError
+import asyncio
 import json
 import hashlib
-from typing import Optional, Any
+import logging
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Optional, Any, AsyncIterator, Awaitable, Callable, Iterable, Mapping
 from .config import settings
+from .metrics import CACHE_ERRORS, CACHE_LATENCY, CACHE_LOOKUPS, CACHE_PAYLOAD_BYTES
+from .sharding import HashRing
+
+logger = logging.getLogger(__name__)
+
+# Keys per DEL/MGET command when fanning out over large key sets
+BATCH_SIZE = 500
+
+# Stored in place of a payload to remember that a lookup found nothing
+MISSING = "__missing__"
+
+# Stored in place of an invalidated entry until reads that began before the
+# invalidation can no longer write it back; reads see a miss
+INVALIDATED = "__invalidated__"
+
+# Metrics label for operations that span several key prefixes
+MIXED_PREFIX = "mixed"
+
+# Returned by _call() on failure so reads can tell errors from misses
+_FAILED = object()
+
+
+def _prefix(key: str) -> str:
+    """Metrics label for a key: the part before the first colon"""
+    return key.split(":", 1)[0]
+
+
+def _size(payload: str | bytes) -> int:
+    return len(payload.encode() if isinstance(payload, str) else payload)
+
+# Sets bits on a bitmap only if it already exists, so an expired filter is
+# never replaced by a sparse one that would reject every other member
+_SETBITS_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for _, offset in ipairs(ARGV) do
+    redis.call('SETBIT', KEYS[1], offset, 1)
+end
+return 1
+"""
+
+# Sets each key (ARGV: ttl, payload pairs) unless it holds the INVALIDATED
+# tombstone
+_BACKFILL = """
+local written = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) ~= ARGV[1] then
+        redis.call('SETEX', key, ARGV[2 * i], ARGV[2 * i + 1])
+        written = written + 1
+    end
+end
+return written
+"""
+
+
+class CircuitBreaker:
+    """
+    Trips open after consecutive failures so callers skip the cache entirely.
+
+    After reset_timeout seconds a single trial call is let through (half-open);
+    success closes the circuit, failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to Redis right now"""
+        state = self.state
+        if state == "half_open":
+            # Re-arm the cooldown so only this caller probes
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ShardedPipeline:
+    """
+    Pipeline that routes each command to the node owning its key (the
+    command's first argument) and runs one Redis pipeline per node.
+    """
+
+    def __init__(self, cache_service: "CacheService", transaction: bool):
+        self._cache = cache_service
+        self._transaction = transaction
+        self._pipes: dict[int, redis.client.Pipeline] = {}
+
+    def __getattr__(self, name: str):
+        def command(key: str, *args, **kwargs):
+            node = self._cache._node(key)
+            pipe = self._pipes.get(node)
+            if pipe is None:
+                pipe = self._pipes[node] = self._cache.nodes[node].pipeline(
+                    transaction=self._transaction
+                )
+            getattr(pipe, name)(key, *args, **kwargs)
+            return self
+        return command
+
+    async def execute(self):
+        """Send every node's commands concurrently, each through its breaker"""
+        await asyncio.gather(*(
+            self._cache._call("pipeline", pipe.execute, node=node)
+            for node, pipe in self._pipes.items()
+        ))
 
 
 class CacheService:
     def __init__(self):
-        self.client: Optional[redis.Redis] = None
+        # One client, circuit breaker and ring position per Redis node
+        self.nodes: list[redis.Redis] = []
+        self.breakers: list[CircuitBreaker] = []
+        self.ring: Optional[HashRing] = None
+        # Per-operation counters for calls skipped by the breaker or failed
+        self.bypassed: Counter = Counter()
+        self.failed: Counter = Counter()
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.nodes)
 
     async def connect(self):
-        """Connect to Redis/Valkey"""
-        self.client = await redis.from_url(
-            settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True
-        )
+        """Connect to Redis/Valkey, sharding over REDIS_URLS when set"""
+        urls = settings.REDIS_URLS or [settings.REDIS_URL]
+        self.nodes = [
+            await redis.from_url(url, encoding="utf-8", decode_responses=True)
+            for url in urls
+        ]
+        self.breakers = [
+            CircuitBreaker(
+                failure_threshold=settings.CACHE_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CACHE_CIRCUIT_RESET_SECONDS,
+            )
+            for _ in urls
+        ]
+        self.ring = HashRing(urls)
 
     async def disconnect(self):
-        """Close Redis connection"""
-        if self.client:
-            await self.client.close()
+        """Close Redis connections"""
+        for client in self.nodes:
+            await client.close()
+        self.nodes = []
+        self.breakers = []
+        self.ring = None
+
+    def _node(self, key: str) -> int:
+        """Index of the node that owns key"""
+        return self.ring.get_node(key)
+
+    def _group(self, keys: Iterable[str]) -> dict[int, list[str]]:
+        """Split keys by owning node, preserving order within each node"""
+        groups: dict[int, list[str]] = {}
+        for key in keys:
+            groups.setdefault(self._node(key), []).append(key)
+        return groups
+
+    async def _call(
+        self,
+        op: str,
+        func: Callable[[], Awaitable[Any]],
+        default: Any = None,
+        timeout: Optional[float] = None,
+        prefix: str = MIXED_PREFIX,
+        node: int = 0,
+    ) -> Any:
+        """
+        Run a Redis operation on one node under the per-operation timeout and
+        that node's circuit breaker.
+
+        Never raises for cache failures: returns default instead, so a slow or
+        unreachable cache degrades to a miss rather than failing the request.
+        Latency and failures are recorded under op and key prefix.
+        """
+        if not self.nodes:
+            return default
+
+        breaker = self.breakers[node]
+        if not breaker.allow():
+            self.bypassed[op] += 1
+            CACHE_ERRORS.labels(op=op, prefix=prefix, kind="bypassed").inc()
+            return default
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(func(), timeout=timeout or settings.CACHE_OPERATION_TIMEOUT)
+        except (asyncio.TimeoutError, RedisError, OSError) as e:
+            breaker.record_failure()
+            self.failed[op] += 1
+            kind = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+            CACHE_ERRORS.labels(op=op, prefix=prefix, kind=kind).inc()
+            logger.warning(f"Cache {op} on node {node} failed ({type(e).__name__}), circuit {breaker.state}")
+            return default
+        finally:
+            CACHE_LATENCY.labels(op=op, prefix=prefix).observe(time.perf_counter() - started)
+
+        breaker.record_success()
+        return result
+
+    async def _on_node(
+        self,
+        op: str,
+        key: str,
+        func: Callable[[redis.Redis], Awaitable[Any]],
+        default: Any = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Run func against the client of the node owning key"""
+        if not self.nodes:
+            return default
+        node = self._node(key)
+        client = self.nodes[node]
+        return await self._call(
+            op, lambda: func(client), default=default, timeout=timeout, prefix=_prefix(key), node=node
+        )
+
+    def _record_lookups(self, prefix: str, values: Iterable[Any]):
+        """Count hits and misses for values read under prefix"""
+        hits = misses = 0
+        for value in values:
+            if value is None:
+                misses += 1
+            else:
+                hits += 1
+        if hits:
+            CACHE_LOOKUPS.labels(prefix=prefix, result="hit").inc(hits)
+        if misses:
+            CACHE_LOOKUPS.labels(prefix=prefix, result="miss").inc(misses)
+
+    def stats(self) -> dict:
+        """Circuit state per node and bypass/failure counters for health reporting"""
+        return {
+            "connected": self.connected,
+            "circuits": [breaker.state for breaker in self.breakers],
+            "bypassed": dict(self.bypassed),
+            "failed": dict(self.failed),
+        }
 
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        if not self.client:
-            return None
-
-        value = await self.client.get(key)
+        value = await self.get_raw(key)
         if value:
             return json.loads(value)
         return None
 
+    async def get_raw(self, key: str) -> Optional[str]:
+        """Get pre-encoded payload from cache without decoding it"""
+        value = await self._on_node("get", key, lambda c: c.get(key), default=_FAILED)
+        if value is _FAILED:
+            return None
+        if value == INVALIDATED:
+            value = None
+        self._record_lookups(_prefix(key), [value])
+        return value
+
     async def set(self, key: str, value: Any, ttl: int):
         """Set value in cache with TTL"""
-        if not self.client:
-            return
+        await self.set_raw(key, json.dumps(value, default=str), ttl)
 
-        await self.client.setex(
-            key,
-            ttl,
-            json.dumps(value, default=str)
-        )
+    async def set_raw(self, key: str, payload: str | bytes, ttl: int, timeout: Optional[float] = None):
+        """Set pre-encoded payload in cache with TTL"""
+        CACHE_PAYLOAD_BYTES.labels(prefix=_prefix(key)).observe(_size(payload))
+        await self._on_node("set", key, lambda c: c.setex(key, ttl, payload), timeout=timeout)
 
     async def delete(self, key: str):
         """Delete key from cache"""
-        if not self.client:
+        await self._on_node("delete", key, lambda c: c.delete(key))
+
+    async def mget(self, keys: Iterable[str], raw: bool = False) -> list[Optional[Any]]:
+        """Get several values with one round trip per node, preserving key order"""
+        keys = list(keys)
+        if not keys or not self.nodes:
+            return [None] * len(keys)
+
+        prefix = _prefix(keys[0])
+
+        async def read(node: int, node_keys: list[str]) -> dict:
+            client = self.nodes[node]
+            values = await self._call(
+                "mget", lambda: client.mget(node_keys), default=_FAILED, prefix=prefix, node=node
+            )
+            if values is _FAILED:
+                return {}
+            values = [None if value == INVALIDATED else value for value in values]
+            self._record_lookups(prefix, values)
+            return dict(zip(node_keys, values))
+
+        found: dict = {}
+        for values in await asyncio.gather(*(
+            read(node, node_keys) for node, node_keys in self._group(keys).items()
+        )):
+            found.update(values)
+
+        values = [found.get(key) for key in keys]
+        if raw:
+            return values
+        return [json.loads(v) if v else None for v in values]
+
+    async def mset_with_ttl(self, mapping: Mapping[str, Any], ttl: int, raw: bool = False):
+        """Set several values with the same TTL in one pipelined round trip per node"""
+        if not mapping:
             return
 
-        await self.client.delete(key)
+        async with self.pipeline() as pipe:
+            if pipe is None:
+                return
+            for key, value in mapping.items():
+                payload = value if raw else json.dumps(value, default=str)
+                CACHE_PAYLOAD_BYTES.labels(prefix=_prefix(key)).observe(_size(payload))
+                pipe.setex(key, ttl, payload)
+
+    async def backfill(self, entries: Iterable[tuple[str, str | bytes, int]]):
+        """
+        Cache (key, payload, ttl) entries read from the database, skipping keys
+        invalidated since: a write that committed after the read left a
+        tombstone there (see invalidate()). One atomic script per node.
+        """
+        groups: dict[int, list[tuple]] = {}
+        for key, payload, ttl in entries:
+            CACHE_PAYLOAD_BYTES.labels(prefix=_prefix(key)).observe(_size(payload))
+            if self.nodes:
+                groups.setdefault(self._node(key), []).append((key, payload, ttl))
+
+        async def write(node: int, node_entries: list[tuple]):
+            client = self.nodes[node]
+            keys = [key for key, _, _ in node_entries]
+            args = [INVALIDATED]
+            for _, payload, ttl in node_entries:
+                args += [ttl, payload]
+            await self._call(
+                "backfill",
+                lambda: client.eval(_BACKFILL, len(keys), *keys, *args),
+                prefix=_prefix(keys[0]),
+                node=node,
+            )
+
+        await asyncio.gather(*(write(node, node_entries) for node, node_entries in groups.items()))
+
+    async def invalidate(self, keys: Iterable[str]):
+        """
+        Replace keys with INVALIDATED tombstones for CACHE_INVALIDATION_GRACE_SECONDS.
+
+        Unlike delete_many(), a read that started before the invalidation
+        and finishes within the grace period can't backfill() stale data.
+        """
+        async with self.pipeline() as pipe:
+            if pipe is None:
+                return
+            for key in keys:
+                pipe.setex(key, settings.CACHE_INVALIDATION_GRACE_SECONDS, INVALIDATED)
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys, batching into as few DEL commands per node as possible"""
+        async def delete_on(node: int, node_keys: list[str]) -> int:
+            client = self.nodes[node]
+            deleted = 0
+            for i in range(0, len(node_keys), BATCH_SIZE):
+                batch = node_keys[i:i + BATCH_SIZE]
+                deleted += await self._call(
+                    "delete", lambda: client.delete(*batch), default=0, node=node
+                )
+            return deleted
+
+        if not self.nodes:
+            return 0
+        return sum(await asyncio.gather(*(
+            delete_on(node, node_keys) for node, node_keys in self._group(keys).items()
+        )))
+
+    async def tag(self, key: str, tags: Iterable[str], ttl: int):
+        """Record key under each tag so invalidate_tags() can find it later"""
+        async with self.pipeline() as pipe:
+            if pipe is None:
+                return
+            for tag in tags:
+                pipe.sadd(tag, key)
+                pipe.expire(tag, ttl)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Delete every key recorded under tags, along with the tags themselves"""
+        if not self.nodes:
+            return 0
+
+        async def pop_members(node: int, node_tags: list[str]) -> set:
+            client = self.nodes[node]
 
-    async def clear_pattern(self, pattern: str):
-        """Clear all keys matching pattern"""
-        if not self.client:
+            async def pop():
+                # Read and drop each tag atomically so keys tagged meanwhile aren't lost
+                async with client.pipeline(transaction=True) as pipe:
+                    for tag in node_tags:
+                        pipe.smembers(tag)
+                        pipe.delete(tag)
+                    return await pipe.execute()
+
+            result = await self._call("invalidate_tags", pop, default=[], node=node)
+            return set().union(*result[::2])
+
+        members = await asyncio.gather(*(
+            pop_members(node, node_tags) for node, node_tags in self._group(tags).items()
+        ))
+        return await self.delete_many(set().union(*members))
+
+    async def top_hits(self, counters: Iterable[str], limit: int) -> list[tuple[str, float]]:
+        """Members with the highest combined score across several sorted-set counters"""
+        if not self.nodes:
+            return []
+
+        async def read(node: int, node_counters: list[str]) -> list:
+            client = self.nodes[node]
+
+            async def rankings():
+                async with client.pipeline(transaction=False) as pipe:
+                    for counter in node_counters:
+                        pipe.zrevrange(counter, 0, limit - 1, withscores=True)
+                    return await pipe.execute()
+
+            return await self._call("top_hits", rankings, default=[], node=node)
+
+        totals: Counter = Counter()
+        for node_rankings in await asyncio.gather(*(
+            read(node, node_counters) for node, node_counters in self._group(counters).items()
+        )):
+            for ranking in node_rankings:
+                for member, score in ranking:
+                    totals[member] += score
+        return totals.most_common(limit)
+
+    async def publish(self, channel: str, message: Any):
+        """Publish a JSON message to subscribers of channel (on the node owning it)"""
+        payload = json.dumps(message, default=str)
+        await self._on_node("publish", channel, lambda c: c.publish(channel, payload))
+
+    async def getbits(self, key: str, offsets: Iterable[int]) -> Optional[list[int]]:
+        """
+        Read several bits of a bitmap in one round trip.
+
+        Returns None if the bitmap doesn't exist or the cache is unavailable.
+        """
+        offsets = list(offsets)
+
+        async def read(client: redis.Redis):
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.exists(key)
+                for offset in offsets:
+                    pipe.getbit(key, offset)
+                return await pipe.execute()
+
+        result = await self._on_node("getbits", key, read)
+        if not result or not result[0]:
+            return None
+        return result[1:]
+
+    async def setbits_if_exists(self, key: str, offsets: Iterable[int]) -> bool:
+        """Atomically set bits on an existing bitmap; never creates the key"""
+        offsets = list(offsets)
+        if not offsets:
+            return False
+
+        return bool(await self._on_node(
+            "setbits",
+            key,
+            lambda c: c.eval(_SETBITS_IF_EXISTS, 1, key, *offsets),
+            default=0
+        ))
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[Optional[ShardedPipeline]]:
+        """
+        Queue commands and send them in a single round trip per node on exit.
+
+        Yields None when the cache is not connected so callers can skip work.
+        Transactions only span keys that live on the same node.
+        """
+        if not self.nodes:
+            yield None
             return
 
-        keys = await self.client.keys(pattern)
-        if keys:
-            await self.client.delete(*keys)
+        pipe = ShardedPipeline(self, transaction)
+        yield pipe
+        await pipe.execute()
+
+    async def clear_pattern(self, pattern: str) -> int:
+        """Clear all keys matching pattern on every node"""
+        async def clear_on(node: int) -> int:
+            client = self.nodes[node]
+            # SCAN instead of KEYS so large keyspaces don't block the server
+            cursor = 0
+            deleted = 0
+            while True:
+                page = await self._call(
+                    "scan",
+                    lambda: client.scan(cursor, match=pattern, count=BATCH_SIZE),
+                    node=node
+                )
+                if page is None:
+                    break
+                cursor, keys = page
+                if keys:
+                    deleted += await self.delete_many(keys)
+                if cursor == 0:
+                    break
+            return deleted
+
+        return sum(await asyncio.gather(*(clear_on(node) for node in range(len(self.nodes)))))
 
     def generate_cache_key(self, prefix: str, **kwargs) -> str:
         """Generate cache key from parameters"""
@@ -1,16 +1,57 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from fastapi import HTTPException, Request
+from sqlalchemy import event, make_url, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import logging
+import time
 from .config import settings
+from . import query_budget, query_log
+from .pool import InstrumentedPool, pool_limits
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds a replica is behind the primary; 0 when it has replayed everything
+# it received, so an idle primary doesn't make replicas look stale
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    pool_size, max_overflow = pool_limits(settings.DATABASE_PROCESS_ROLE)
+    async_engine = create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    )
+    query_log.install(async_engine)
+    query_budget.install(async_engine)
+    return async_engine
+
 
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=40,
-)
+engine = _create_engine(settings.DATABASE_URL, "primary")
+
+# Read replicas, used by read-only endpoints through get_read_db
+replica_engines = [
+    _create_engine(url, make_url(url).host or f"replica{i}")
+    for i, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -25,9 +66,122 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+class ReplicaRouter:
+    """
+    Picks the engine for read-only sessions.
+
+    Replicas are used round-robin while their replication lag is within
+    DATABASE_REPLICA_MAX_LAG_SECONDS. Lag is measured at most every
+    DATABASE_REPLICA_LAG_CHECK_SECONDS per replica; a replica that is lagging
+    or unreachable is skipped until its next check, and the primary is used
+    when no replica qualifies.
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: list[AsyncEngine]):
+        self.primary = primary
+        self.replicas = replicas
+        # Last measured lag per replica; None when the check failed
+        self.lag: list[Optional[float]] = [None] * len(replicas)
+        self.checked_at: list[float] = [float("-inf")] * len(replicas)
+        self._next = 0
+
+    async def _measure(self, replica: AsyncEngine) -> Optional[float]:
+        async def query():
+            async with replica.connect() as conn:
+                return float((await conn.execute(text(REPLICA_LAG_SQL))).scalar())
+
+        try:
+            return await asyncio.wait_for(query(), timeout=settings.DATABASE_REPLICA_CHECK_TIMEOUT)
+        except (asyncio.TimeoutError, SQLAlchemyError, OSError) as e:
+            logger.warning(f"Replica {replica.url.host} lag check failed: {type(e).__name__}")
+            return None
+
+    async def _usable(self, index: int) -> bool:
+        now = time.monotonic()
+        if now - self.checked_at[index] >= settings.DATABASE_REPLICA_LAG_CHECK_SECONDS:
+            # Stamp before measuring so concurrent requests don't all re-check
+            self.checked_at[index] = now
+            self.lag[index] = await self._measure(self.replicas[index])
+            if self.lag[index] is not None and self.lag[index] > settings.DATABASE_REPLICA_MAX_LAG_SECONDS:
+                logger.warning(f"Replica {self.replicas[index].url.host} is {self.lag[index]:.1f}s behind, using primary")
+
+        lag = self.lag[index]
+        return lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+
+    async def choose(self) -> AsyncEngine:
+        """Next healthy replica, or the primary if none is"""
+        for offset in range(len(self.replicas)):
+            index = (self._next + offset) % len(self.replicas)
+            if await self._usable(index):
+                self._next = index + 1
+                return self.replicas[index]
+        return self.primary
+
+    def stats(self) -> list[dict]:
+        """Host and last measured lag per replica for health reporting"""
+        return [
+            {"host": replica.url.host, "lag_seconds": lag}
+            for replica, lag in zip(self.replicas, self.lag)
+        ]
+
+
+replica_router = ReplicaRouter(engine, replica_engines)
+
+
+def statement_timeout_for(request: Request) -> int:
+    """Statement timeout in ms for a request's route (STATEMENT_TIMEOUTS or the default)"""
+    return settings.STATEMENT_TIMEOUTS.get(
+        query_log.route_name(request.scope), settings.STATEMENT_TIMEOUT_MS
+    )
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    """Limit every statement of the transaction to the session's timeout"""
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Await awaitable, cancelling it if the client disconnects first.
+
+    Cancelling the task cancels its in-flight asyncpg query on the server, so an
+    abandoned request stops holding a connection. Raises a 499 HTTPException
+    once the work has unwound.
+    """
+    task = asyncio.ensure_future(awaitable)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=settings.CLIENT_DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            break
+
+    task.cancel()
+    await asyncio.wait({task})
+    logger.info(f"Client disconnected, cancelled {query_log.route_name(request.scope)}")
+    raise HTTPException(status_code=499, detail="Client disconnected")
+
+
 # Dependency to get database session
-async def get_db():
+async def get_db(request: Request):
     async with AsyncSessionLocal() as session:
+        session.info["statement_timeout_ms"] = statement_timeout_for(request)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+# Dependency to get a read-only session, on a replica when one is healthy.
+# Reads may trail the primary by up to DATABASE_REPLICA_MAX_LAG_SECONDS.
+async def get_read_db(request: Request):
+    bind = await replica_router.choose()
+    async with AsyncSessionLocal(bind=bind) as session:
+        session.info["statement_timeout_ms"] = statement_timeout_for(request)
+        session.info["replica"] = bind is not engine
         try:
             yield session
         finally:
@@ -0,0 +1,154 @@
+"""
+Cache Invalidation
+
+Turns property and analysis writes into change events and invalidates only
+the cache entries they touch.
+
+SQLAlchemy session events collect the affected property ids and states on
+flush. On commit they are published on CHANGES_CHANNEL, the per-property
+entries are replaced with short-lived tombstones, and search result sets
+tagged with those states (plus searches without a state filter) are dropped.
+Writes that bypass the ORM (raw SQL, external loaders) are not seen and still
+rely on TTL expiry.
+
+A request that read before the commit may try to cache what it read after
+the invalidation ran. Per-property entries are written with cache.backfill(),
+which skips tombstoned keys; result sets are cached under their tag's search
+generation, which each invalidation moves on, so late writes land under keys
+no longer read. Reads that outlast CACHE_INVALIDATION_GRACE_SECONDS can still
+cache a per-property entry stale until its TTL.
+"""
+from typing import Iterable, Optional
+import logging
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.bloom import property_filter
+from app.models.property import (
+    Property,
+    RoofIQAnalysis,
+    SolarFitAnalysis,
+    DrivewayProAnalysis,
+    PermitScopeAnalysis,
+)
+
+logger = logging.getLogger(__name__)
+
+CHANGES_CHANNEL = "property_changes"
+
+ANALYSIS_MODELS = (RoofIQAnalysis, SolarFitAnalysis, DrivewayProAnalysis, PermitScopeAnalysis)
+
+# Per-property cache key prefixes ({prefix}:{property_id})
+PROPERTY_KEY_PREFIXES = ("property", "property_summary", "roofiq", "solarfit")
+
+# Tag for searches that aren't limited to one state
+ALL_REGIONS = "all"
+
+_INFO_KEY = "property_changes"
+
+
+def search_tag(state: Optional[str]) -> str:
+    """Invalidation tag for search result sets scoped to state"""
+    return f"property_search:tag:{state.upper() if state else ALL_REGIONS}"
+
+
+def search_generation_key(state: Optional[str]) -> str:
+    """Key holding the search generation of result sets scoped to state"""
+    return f"property_search:generation:{state.upper() if state else ALL_REGIONS}"
+
+
+async def bump_search_generations(states: Iterable[str]):
+    """
+    Start new search generations for states and for unscoped searches.
+
+    A generation is the time it started; it lives as long as the longest
+    result set TTL, so one that expires is never reused while entries cached
+    under it remain.
+    """
+    generation = f"{time.time():.6f}"
+    ttl = max(settings.CACHE_PROPERTY_SEARCH_TTL, settings.CACHE_WARM_TTL)
+    async with cache.pipeline() as pipe:
+        if pipe is None:
+            return
+        for state in (*states, None):
+            pipe.setex(search_generation_key(state), ttl, generation)
+
+
+async def invalidate_properties(
+    property_ids: Iterable[str],
+    states: Iterable[str],
+    new_property_ids: Iterable[str] = (),
+):
+    """Publish a change event and invalidate the entries it touches"""
+    property_ids = sorted(set(property_ids))
+    states = sorted(set(states))
+
+    await cache.publish(CHANGES_CHANNEL, {"property_ids": property_ids, "states": states})
+
+    await bump_search_generations(states)
+    await cache.invalidate(
+        f"{prefix}:{property_id}"
+        for property_id in property_ids
+        for prefix in PROPERTY_KEY_PREFIXES
+    )
+    await cache.invalidate_tags([search_tag(state) for state in states] + [search_tag(None)])
+    await property_filter.add(new_property_ids)
+
+    logger.debug(f"Invalidated cache for {len(property_ids)} properties in {states}")
+
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault(
+        _INFO_KEY, {"property_ids": set(), "new_property_ids": set(), "states": set()}
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context):
+    """Record property ids and states touched by this flush"""
+    changes = None
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Property):
+            changes = changes or _pending(session)
+            changes["property_ids"].add(str(obj.id))
+            if obj in session.new:
+                changes["new_property_ids"].add(str(obj.id))
+            # Both the current and any previous state lose their searches
+            previous_states = inspect(obj).attrs.state.history.deleted or ()
+            for state in (obj.state, *previous_states):
+                if state:
+                    changes["states"].add(state.upper())
+        elif isinstance(obj, ANALYSIS_MODELS) and obj.property_id:
+            changes = changes or _pending(session)
+            changes["property_ids"].add(str(obj.property_id))
+            if obj.property_state:
+                changes["states"].add(obj.property_state.upper())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    """Invalidate after commit, once new readers see the committed data"""
+    changes = session.info.pop(_INFO_KEY, None)
+    if not changes:
+        return
+
+    # Async sessions commit inside a greenlet, so the invalidation completes
+    # before `await session.commit()` returns
+    if not in_greenlet():
+        logger.warning("Skipping cache invalidation for a synchronous session commit")
+        return
+
+    await_only(invalidate_properties(
+        changes["property_ids"], changes["states"], changes["new_property_ids"]
+    ))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop(_INFO_KEY, None)
@@ -0,0 +1,88 @@
+"""
+Metrics
+
+Prometheus metrics for the API, the cache layer and the database pools.
+
+When running several worker processes, set PROMETHEUS_MULTIPROC_DIR to a
+shared, empty directory so /metrics aggregates every process.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Cache reads by key prefix, result is "hit" or "miss"
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache reads by key prefix and result",
+    ["prefix", "result"],
+)
+
+# Cache operations that didn't reach or complete in Redis: "timeout", "error", "bypassed"
+CACHE_ERRORS = Counter(
+    "cache_errors_total",
+    "Failed or circuit-bypassed cache operations",
+    ["op", "prefix", "kind"],
+)
+
+CACHE_LATENCY = Histogram(
+    "cache_operation_seconds",
+    "Cache operation latency",
+    ["op", "prefix"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+CACHE_PAYLOAD_BYTES = Histogram(
+    "cache_payload_bytes",
+    "Size of values written to the cache",
+    ["prefix"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+
+# Database pools, labelled by pool ("primary" or replica host) and process role.
+# Gauges are summed across live processes, to compare with the connection budget.
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to check a connection out of the pool, including waiting for one",
+    ["pool", "role"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after DATABASE_POOL_TIMEOUT",
+    ["pool", "role"],
+)
+
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out",
+    ["pool", "role"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond pool_size",
+    ["pool", "role"],
+    multiprocess_mode="livesum",
+)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def render_metrics() -> bytes:
+    """Metrics in Prometheus text format, aggregated across processes if configured"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,59 @@
+"""
+Connection Pools
+
+Pool sizing per process role and pool instrumentation.
+
+Every API worker and Celery worker process has its own pools, so per-process
+sizes are derived from one DATABASE_CONNECTION_BUDGET per database server:
+DATABASE_CELERY_SHARE of it is split over DATABASE_CELERY_PROCESSES and the
+rest over DATABASE_API_PROCESSES.
+"""
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .config import settings
+from .metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_IN_USE, DB_POOL_OVERFLOW, DB_POOL_TIMEOUTS
+
+
+def pool_limits(role: str) -> tuple[int, int]:
+    """(pool_size, max_overflow) for one process of role"""
+    if role == "celery":
+        share, processes = settings.DATABASE_CELERY_SHARE, settings.DATABASE_CELERY_PROCESSES
+    else:
+        share, processes = 1 - settings.DATABASE_CELERY_SHARE, settings.DATABASE_API_PROCESSES
+
+    per_process = max(2, int(settings.DATABASE_CONNECTION_BUDGET * share) // processes)
+    max_overflow = int(per_process * settings.DATABASE_POOL_OVERFLOW_FRACTION)
+    return per_process - max_overflow, max_overflow
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that reports checkout time, timeouts, connections in use
+    and overflow. Labelled by the engine's pool_logging_name.
+    """
+
+    def _labels(self) -> dict:
+        return {"pool": self.logging_name or "primary", "role": settings.DATABASE_PROCESS_ROLE}
+
+    def _report(self):
+        labels = self._labels()
+        DB_POOL_IN_USE.labels(**labels).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(**labels).set(max(self.overflow(), 0))
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(**self._labels()).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(**self._labels()).observe(time.perf_counter() - started)
+            self._report()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report()
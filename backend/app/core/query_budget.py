@@ -0,0 +1,90 @@
+"""
+Query Budget
+
+Counts SQL statements and database time per request. The totals are sent in
+a Server-Timing header; requests over QUERY_BUDGET_STATEMENTS, or repeating one
+statement QUERY_N_PLUS_ONE_THRESHOLD times (the shape of an N+1 loop), are
+logged, and rejected when QUERY_BUDGET_ENFORCE is set (as in tests).
+"""
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text quoted in budget violations
+MAX_STATEMENT_LENGTH = 200
+
+_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    """Statements executed and time spent in the database for one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least threshold times"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms:.1f};desc="{self.count} queries"'
+
+
+def start() -> QueryStats:
+    """Start counting queries issued from the current context"""
+    stats = QueryStats()
+    _stats.set(stats)
+    return stats
+
+
+def budget_for(source: Optional[str]) -> int:
+    """Statement budget for a route, from QUERY_BUDGET_OVERRIDES or the default"""
+    return settings.QUERY_BUDGET_OVERRIDES.get(source, settings.QUERY_BUDGET_STATEMENTS)
+
+
+def violations(stats: QueryStats, source: Optional[str]) -> list[str]:
+    """Budget and N+1 problems of a finished request, logged as they are found"""
+    problems = []
+
+    budget = budget_for(source)
+    if stats.count > budget:
+        problems.append(f"{stats.count} statements exceed the budget of {budget}")
+
+    for statement, n in stats.repeated(settings.QUERY_N_PLUS_ONE_THRESHOLD):
+        problems.append(f"possible N+1: executed {n} times: {' '.join(statement.split())[:MAX_STATEMENT_LENGTH]}")
+
+    for problem in problems:
+        logger.warning(f"{source}: {problem}")
+    return problems
+
+
+def install(async_engine: AsyncEngine):
+    """Register the per-request counting hooks on an engine"""
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["budget_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["budget_started"]
+        stats = _stats.get()
+        if stats is not None:
+            stats.record(statement, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,147 @@
+"""
+Slow Query Log
+
+Engine event hooks that log SQL statements slower than SLOW_QUERY_THRESHOLD_MS
+as one JSON object per line, with the shape of their bind parameters, the
+endpoint or task that issued them and their row count. A sample of the
+slowest statements also gets its EXPLAIN plan logged.
+"""
+from contextvars import ContextVar
+from typing import Any, Optional, Union
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Execution option that keeps a statement out of the log (used by EXPLAIN itself)
+SKIP_OPTION = "skip_query_log"
+
+# Longest statement text written to the log
+MAX_STATEMENT_LENGTH = 2000
+
+# What is issuing queries: the ASGI scope of the current request (its route is
+# resolved lazily, once routing has run) or a label such as a Celery task name
+_source: ContextVar[Union[dict, str, None]] = ContextVar("query_source", default=None)
+
+# EXPLAIN tasks in flight, kept referenced until they finish
+_explains: set = set()
+
+
+def set_source(source: Union[dict, str, None]):
+    """Attribute queries issued from the current context to source"""
+    _source.set(source)
+
+
+def route_name(scope: dict) -> str:
+    """Route template of a request, e.g. "GET /api/v1/properties/{property_id}" """
+    route = scope.get("route")
+    return f"{scope.get('method')} {route.path if route else scope.get('path')}"
+
+
+def current_source() -> Optional[str]:
+    """Route template or label issuing queries from the current context"""
+    source = _source.get()
+    if isinstance(source, dict):
+        return route_name(source)
+    return source
+
+
+def _shape(value: Any) -> str:
+    """Type of a bind value without its content"""
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def bind_shapes(parameters: Any, executemany: bool) -> Any:
+    """Shapes of the bind parameters of a statement, or the batch size for executemany"""
+    if executemany:
+        return {"executemany": len(parameters)}
+    if isinstance(parameters, dict):
+        return {name: _shape(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_shape(value) for value in parameters]
+    return None
+
+
+def _fingerprint(statement: str) -> str:
+    """Stable id to match a slow-query line with its EXPLAIN line"""
+    return hashlib.md5(statement.encode()).hexdigest()[:12]
+
+
+def _explainable(statement: str) -> bool:
+    return statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+async def _explain(async_engine: AsyncEngine, statement: str, parameters: Any, query_id: str):
+    """Log the plan of a slow statement, using its own pooled connection"""
+    try:
+        async with async_engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}",
+                parameters,
+                execution_options={SKIP_OPTION: True},
+            )
+            plan = result.scalar()
+    except (SQLAlchemyError, OSError) as e:
+        logger.warning(f"EXPLAIN for query {query_id} failed: {type(e).__name__}")
+        return
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    logger.warning("Slow query plan " + json.dumps({"query_id": query_id, "plan": plan}, default=str))
+
+
+def install(async_engine: AsyncEngine):
+    """Register the slow-query hooks on an engine"""
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _log_slow(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["query_started"]) * 1000
+        if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+            return
+        if context.execution_options.get(SKIP_OPTION):
+            return
+
+        query_id = _fingerprint(statement)
+        rowcount = cursor.rowcount
+        logger.warning("Slow query " + json.dumps({
+            "query_id": query_id,
+            "duration_ms": round(duration_ms, 1),
+            "source": current_source(),
+            "rowcount": rowcount if rowcount >= 0 else None,
+            "statement": re.sub(r"\s+", " ", statement).strip()[:MAX_STATEMENT_LENGTH],
+            "binds": bind_shapes(parameters, executemany),
+        }))
+
+        if (
+            duration_ms >= settings.SLOW_QUERY_EXPLAIN_THRESHOLD_MS
+            and not executemany
+            and _explainable(statement)
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        ):
+            # Runs after the current statement on a separate connection, so the
+            # request's transaction and result are left untouched
+            task = asyncio.get_running_loop().create_task(
+                _explain(async_engine, statement, parameters, query_id)
+            )
+            _explains.add(task)
+            task.add_done_callback(_explains.discard)
@@ -0,0 +1,261 @@
+"""
+Region Aggregates
+
+Keeps region_aggregates, one summary row per (state, county, city, zip),
+current without recomputing it from the raw tables on every read.
+
+A session event queues the regions a flush touches in region_refresh_queue,
+in the same transaction: both the old and new region of a property whose
+location fields change, and the region of every property whose analyses are
+added, changed or deleted. The refresh_region_aggregates task recomputes just
+the queued regions. rebuild_state() recomputes a whole state; the nightly
+rebuild uses it to move the recent-permit window forward and to pick up
+writes that bypass the ORM.
+"""
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+import logging
+
+from sqlalchemy import delete, event, func, inspect, select, text, true, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.property import (
+    Property,
+    RoofCondition,
+    RoofIQAnalysis,
+    SolarFitAnalysis,
+    DrivewayProAnalysis,
+    PermitScopeAnalysis,
+)
+from app.models.region import RegionAggregate, RegionRefresh
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_MODELS = (RoofIQAnalysis, SolarFitAnalysis, DrivewayProAnalysis, PermitScopeAnalysis)
+
+REGION_COLUMNS = ("state", "county", "city", "zip")
+
+# Rows per upsert statement (asyncpg allows 32767 parameters)
+UPSERT_CHUNK = 1000
+
+# Advisory lock namespaces (first lock key) for serializing refreshes
+REGION_LOCK = "region_aggregates:region"
+STATE_LOCK = "region_aggregates:state"
+
+
+def region_key(state: str, county: Optional[str], city: Optional[str], zip_code: Optional[str]) -> tuple:
+    """A region as stored in region_aggregates: upper-case state, '' for missing values"""
+    return (state.upper(), county or "", city or "", zip_code or "")
+
+
+def _previous_region(prop: Property) -> tuple:
+    """The region a property was in when loaded"""
+    attrs = inspect(prop).attrs
+    values = []
+    for name in REGION_COLUMNS:
+        deleted = attrs[name].history.deleted
+        values.append(deleted[0] if deleted else getattr(prop, name))
+    return region_key(*values)
+
+
+@event.listens_for(Session, "before_flush")
+def _queue_regions(session: Session, flush_context, instances):
+    """Queue the regions whose aggregates this flush changes"""
+    regions = set()
+    analysed = set()
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Property):
+            if obj in session.new:
+                regions.add(region_key(obj.state, obj.county, obj.city, obj.zip))
+            elif obj in session.deleted:
+                regions.add(_previous_region(obj))
+            elif any(inspect(obj).attrs[name].history.has_changes() for name in REGION_COLUMNS):
+                regions.add(_previous_region(obj))
+                regions.add(region_key(obj.state, obj.county, obj.city, obj.zip))
+        elif isinstance(obj, ANALYSIS_MODELS) and obj.property_id:
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            analysed.add((obj.property_id, obj.property_state))
+
+    if analysed:
+        # Properties added in this flush are already queued and not in the table yet
+        result = session.execute(
+            select(Property.state, Property.county, Property.city, Property.zip).where(
+                Property.state.in_({state for _, state in analysed if state}),
+                Property.id.in_({property_id for property_id, _ in analysed}),
+            )
+        )
+        regions.update(region_key(*row) for row in result)
+
+    for state, county, city, zip_code in regions:
+        session.add(RegionRefresh(state=state, county=county, city=city, zip=zip_code))
+
+
+def aggregate_query(today: date):
+    """Per-region summaries computed from the raw tables"""
+    county = func.coalesce(Property.county, "")
+    city = func.coalesce(Property.city, "")
+    zip_code = func.coalesce(Property.zip, "")
+    recent = today - timedelta(days=settings.REGION_RECENT_PERMIT_DAYS)
+
+    return (
+        select(
+            Property.state.label("state"),
+            county.label("county"),
+            city.label("city"),
+            zip_code.label("zip"),
+            func.count().label("property_count"),
+            func.count(SolarFitAnalysis.id).label("solar_count"),
+            func.coalesce(func.sum(SolarFitAnalysis.score), 0).label("solar_score_sum"),
+            *(
+                func.count().filter(RoofIQAnalysis.condition == condition).label(f"roof_{condition.value}")
+                for condition in RoofCondition
+            ),
+            func.count(PermitScopeAnalysis.id).label("permit_count"),
+            func.coalesce(func.sum(PermitScopeAnalysis.total_permits), 0).label("total_permits"),
+            func.count().filter(PermitScopeAnalysis.last_permit_date >= recent).label("recent_permit_count"),
+            func.count(PermitScopeAnalysis.construction_activity_score).label("construction_activity_count"),
+            func.coalesce(func.sum(PermitScopeAnalysis.construction_activity_score), 0)
+            .label("construction_activity_sum"),
+        )
+        .select_from(Property)
+        .outerjoin(SolarFitAnalysis)
+        .outerjoin(RoofIQAnalysis)
+        .outerjoin(PermitScopeAnalysis)
+        .group_by(Property.state, county, city, zip_code)
+    )
+
+
+async def _upsert(session: AsyncSession, rows: list[dict], refreshed_at: datetime):
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        chunk = [{**row, "refreshed_at": refreshed_at} for row in rows[start:start + UPSERT_CHUNK]]
+        statement = insert(RegionAggregate).values(chunk)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(REGION_COLUMNS),
+            set_={
+                column: statement.excluded[column]
+                for column in chunk[0]
+                if column not in REGION_COLUMNS
+            },
+        )
+        await session.execute(statement)
+
+
+async def _lock_regions(session: AsyncSession, state: str, keys: set):
+    """
+    Wait until no other transaction is refreshing these regions or rebuilding
+    their state, and hold them until commit.
+
+    Without this, two workers that dequeued the same region could refresh it
+    at once, and the one that read the older snapshot could commit last.
+    Locks are taken in (state, region) order so concurrent refreshes can't
+    deadlock.
+    """
+    await session.execute(
+        text("SELECT pg_advisory_xact_lock_shared(hashtext(:namespace), hashtext(:state))"),
+        {"namespace": STATE_LOCK, "state": state},
+    )
+    await session.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(hashtext(:namespace), hashtext(region)) "
+            "FROM (SELECT region FROM unnest(CAST(:regions AS text[])) AS region ORDER BY region) AS ordered"
+        ),
+        {"namespace": REGION_LOCK, "regions": ["/".join((state, *key)) for key in keys]},
+    )
+
+
+async def refresh_regions(session: AsyncSession, regions: Iterable[tuple]) -> int:
+    """
+    Recompute the aggregates of regions; regions left without properties are
+    deleted. Each state's regions are read from its partitions only, through
+    the zip or city index when every region has one.
+    """
+    by_state = {}
+    for state, county, city, zip_code in regions:
+        by_state.setdefault(state, set()).add((county, city, zip_code))
+
+    refreshed_at = datetime.utcnow()
+    query = aggregate_query(refreshed_at.date())
+    refreshed = 0
+    for state, keys in sorted(by_state.items()):
+        await _lock_regions(session, state, keys)
+
+        zips = {zip_code for _, _, zip_code in keys}
+        cities = {city for _, city, _ in keys}
+        if "" not in zips:
+            narrow = Property.zip.in_(zips)
+        elif "" not in cities:
+            narrow = Property.city.in_(cities)
+        else:
+            narrow = true()
+
+        result = await session.execute(query.where(
+            Property.state == state,
+            narrow,
+            tuple_(
+                func.coalesce(Property.county, ""),
+                func.coalesce(Property.city, ""),
+                func.coalesce(Property.zip, ""),
+            ).in_(keys),
+        ))
+        rows = [dict(row._mapping) for row in result]
+        await _upsert(session, rows, refreshed_at)
+
+        emptied = keys - {(row["county"], row["city"], row["zip"]) for row in rows}
+        if emptied:
+            await session.execute(delete(RegionAggregate).where(
+                RegionAggregate.state == state,
+                tuple_(RegionAggregate.county, RegionAggregate.city, RegionAggregate.zip).in_(emptied),
+            ))
+        refreshed += len(keys)
+
+    return refreshed
+
+
+async def refresh_queued(session: AsyncSession, limit: int) -> tuple[int, int]:
+    """
+    Take up to limit rows off the queue and refresh their regions; returns
+    the rows dequeued and the distinct regions refreshed.
+
+    Queue rows are locked with SKIP LOCKED, so concurrent runs take different
+    rows, and removed in the caller's transaction: if the refresh fails they
+    stay queued. A region queued by several rows is refreshed once.
+    """
+    queued = (
+        select(RegionRefresh.id)
+        .order_by(RegionRefresh.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(
+        delete(RegionRefresh)
+        .where(RegionRefresh.id.in_(queued.scalar_subquery()))
+        .returning(RegionRefresh.state, RegionRefresh.county, RegionRefresh.city, RegionRefresh.zip)
+    )
+    rows = [tuple(row) for row in result]
+    if not rows:
+        return 0, 0
+    return len(rows), await refresh_regions(session, set(rows))
+
+
+async def rebuild_state(session: AsyncSession, state: str) -> int:
+    """Recompute every region of a state, dropping regions that no longer have properties"""
+    # Waits for refreshes in the state to commit and holds new ones off
+    await session.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:namespace), hashtext(:state))"),
+        {"namespace": STATE_LOCK, "state": state},
+    )
+    refreshed_at = datetime.utcnow()
+    result = await session.execute(aggregate_query(refreshed_at.date()).where(Property.state == state))
+    rows = [dict(row._mapping) for row in result]
+    await _upsert(session, rows, refreshed_at)
+
+    await session.execute(delete(RegionAggregate).where(
+        RegionAggregate.state == state,
+        RegionAggregate.refreshed_at < refreshed_at,
+    ))
+    return len(rows)
@@ -0,0 +1,39 @@
+"""
+Sharding
+
+Consistent hashing for spreading cache keys over several Redis nodes.
+"""
+import bisect
+import hashlib
+from typing import List
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes.
+
+    Each node is placed on the ring `replicas` times, keyed by its name, so
+    placement doesn't depend on list order and adding a node only moves
+    about 1/(n+1) of the keys (those now closest to the new node's points).
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = 160):
+        self.nodes = list(nodes)
+        points = sorted(
+            (self._hash(f"{node}#{replica}"), index)
+            for index, node in enumerate(self.nodes)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [index for _, index in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def get_node(self, key: str) -> int:
+        """Index in `nodes` of the node that owns key"""
+        if len(self.nodes) == 1:
+            return 0
+        position = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[position]
@@ -1,10 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.cache import cache
-from app.api.v1 import properties, saved_searches, google_ads, territories, comparison, bulk_import, analytics
+from app.core.database import replica_router
+from app.core.metrics import render_metrics, METRICS_CONTENT_TYPE
+from app.core import query_budget, query_log
+from app.core import invalidation  # noqa: F401  (registers cache invalidation session events)
+from app.core import analysis_history  # noqa: F401  (registers analysis history session events)
+from app.core import region_aggregates  # noqa: F401  (registers region refresh session events)
+from app.api.v1 import properties, saved_searches, google_ads, territories, comparison, bulk_import, analytics, regions
 
 
 @asynccontextmanager
@@ -40,6 +48,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def track_queries(request: Request, call_next):
+    """
+    Attribute SQL to the request's route and count it against the query budget.
+
+    Statement count and database time go out in a Server-Timing header.
+    """
+    query_log.set_source(request.scope)
+    stats = query_budget.start()
+
+    response = await call_next(request)
+
+    problems = query_budget.violations(stats, query_log.current_source())
+    if problems and settings.QUERY_BUDGET_ENFORCE:
+        response = JSONResponse(
+            status_code=500,
+            content={"detail": "Query budget exceeded", "problems": problems},
+        )
+    response.headers.append("Server-Timing", stats.server_timing())
+    return response
+
 # Include routers
 app.include_router(properties.router, prefix=settings.API_V1_STR)
 app.include_router(saved_searches.router, prefix=settings.API_V1_STR)
@@ -48,6 +78,7 @@ app.include_router(territories.router, prefix=settings.API_V1_STR)
 app.include_router(comparison.router, prefix=settings.API_V1_STR)
 app.include_router(bulk_import.router, prefix=settings.API_V1_STR)
 app.include_router(analytics.router, prefix=settings.API_V1_STR)
+app.include_router(regions.router, prefix=settings.API_V1_STR)
 
 
 @app.get("/")
@@ -61,7 +92,21 @@ async def root():
     }
 
 
+@app.exception_handler(DBAPIError)
+async def statement_timeout_handler(request: Request, exc: DBAPIError):
+    """Report queries cancelled by statement_timeout as 504 instead of a generic 500"""
+    if getattr(exc.orig, "sqlstate", None) == "57014":  # query_canceled
+        return JSONResponse(status_code=504, content={"detail": "Query took too long"})
+    raise exc
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "cache": cache.stats(), "replicas": replica_router.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (cache hit ratio, latency and payload sizes by key prefix)"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
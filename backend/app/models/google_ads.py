@@ -121,14 +121,19 @@ class CustomerMatchAudience(Base):
 
 
 class AudienceSyncHistory(Base):
-    """History of audience syncs to Google Ads"""
+    """
+    History of audience syncs to Google Ads.
+
+    Range-partitioned by month of started_at; expired months are dropped by
+    the maintain_partitions task.
+    """
     __tablename__ = "audience_sync_history"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     audience_id = Column(UUID(as_uuid=True), ForeignKey("customer_match_audiences.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Sync details
-    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Partition key
     completed_at = Column(DateTime)
     status = Column(Enum(AudienceSyncStatus), default=AudienceSyncStatus.PENDING, nullable=False)
 
@@ -149,6 +154,8 @@ class AudienceSyncHistory(Base):
     # Relationships
     audience = relationship("CustomerMatchAudience", back_populates="sync_history")
 
+    __table_args__ = {"postgresql_partition_by": "RANGE (started_at)"}
+
     def __repr__(self):
         return f"<AudienceSyncHistory(audience_id={self.audience_id}, status={self.status})>"
 
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Float, Integer, Text, DateTime, ForeignKey, Enum, Boolean, Date, DECIMAL, CheckConstraint
+from sqlalchemy import Column, String, Float, Integer, Text, DateTime, ForeignKeyConstraint, Enum, Boolean, Date, DECIMAL, CheckConstraint, Computed, Index, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
-from geoalchemy2 import Geometry
+from sqlalchemy.orm import deferred, relationship
+from geoalchemy2 import Geography, Geometry
 from datetime import datetime
 import uuid
 import enum
@@ -36,19 +36,60 @@ class Complexity(str, enum.Enum):
     COMPLEX = "complex"
 
 
+# Geohash length of the key properties are physically ordered by (~1 m cells)
+SPATIAL_KEY_PRECISION = 10
+
+
+def _state_partitioned(*args):
+    """
+    Table args for tables LIST-partitioned by state (see
+    migrations/001_partition_properties_by_state.sql for the partitions).
+    """
+    return (*args, {"postgresql_partition_by": "LIST (state)"})
+
+
+def _property_partitioned(*args):
+    """Table args for tables of per-property rows, partitioned like their property"""
+    return (
+        ForeignKeyConstraint(
+            ["property_id", "property_state"],
+            ["properties.id", "properties.state"],
+            onupdate="CASCADE",
+        ),
+        *args,
+        {"postgresql_partition_by": "LIST (property_state)"},
+    )
+
+
+def _latest_per_property():
+    """
+    Analysis tables hold each property's latest analysis only; earlier
+    versions live in analysis_history (see app/core/analysis_history.py)
+    """
+    return UniqueConstraint("property_id", "property_state")
+
+
 class Property(Base):
     __tablename__ = "properties"
 
+    # The primary key is (id, state) because partitioned tables must include
+    # the partition key; the ORM uses both, so its UPDATEs and DELETEs name
+    # the partition
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     address = Column(String, nullable=False, index=True)
     city = Column(String, index=True)
-    state = Column(String(2), index=True)
+    state = Column(String(2), primary_key=True)  # Partition key, upper-case
     zip = Column(String(10), index=True)
     county = Column(String)
-    latitude = Column(DECIMAL(10, 8), nullable=False)
-    longitude = Column(DECIMAL(11, 8), nullable=False)
+    latitude = Column(Float, nullable=False)  # double precision, read as float
+    longitude = Column(Float, nullable=False)
     property_type = Column(Enum(PropertyType), nullable=False, index=True)
     geometry = Column(Geometry('POLYGON', srid=4326), nullable=False)
+    # For distance queries in meters (ST_DWithin, ST_Distance); not loaded with the row
+    location = deferred(Column(
+        Geography('POINT', srid=4326),
+        Computed("ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography", persisted=True),
+    ))
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -59,9 +100,15 @@ class Property(Base):
     drivewaypro = relationship("DrivewayProAnalysis", back_populates="property", uselist=False)
     permitscope = relationship("PermitScopeAnalysis", back_populates="property", uselist=False)
 
-    __table_args__ = (
+    __table_args__ = _state_partitioned(
         CheckConstraint("latitude >= -90 AND latitude <= 90", name="valid_latitude"),
         CheckConstraint("longitude >= -180 AND longitude <= 180", name="valid_longitude"),
+        # Partitions are CLUSTERed on this (recluster_properties task) so that
+        # nearby properties share heap pages
+        Index(
+            "ix_properties_geohash",
+            func.ST_GeoHash(func.ST_Centroid(geometry), SPATIAL_KEY_PRECISION).collate("C"),
+        ),
     )
 
 
@@ -69,7 +116,9 @@ class RoofIQAnalysis(Base):
     __tablename__ = "roofiq_analyses"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    property_id = Column(UUID(as_uuid=True), ForeignKey("properties.id"), nullable=False, index=True)
+    property_id = Column(UUID(as_uuid=True), nullable=False)
+    property_state = Column(String(2), primary_key=True)  # Partition key, the property's state
+    version = Column(Integer, default=1, nullable=False)  # Bumped on every re-analysis
 
     condition = Column(Enum(RoofCondition), nullable=False, index=True)
     confidence = Column(Integer, nullable=False)
@@ -87,7 +136,8 @@ class RoofIQAnalysis(Base):
     # Relationship
     property = relationship("Property", back_populates="roofiq")
 
-    __table_args__ = (
+    __table_args__ = _property_partitioned(
+        _latest_per_property(),
         CheckConstraint("confidence >= 0 AND confidence <= 100", name="valid_confidence"),
         CheckConstraint("age_years >= 0", name="valid_age"),
     )
@@ -97,13 +147,16 @@ class SolarFitAnalysis(Base):
     __tablename__ = "solarfit_analyses"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    property_id = Column(UUID(as_uuid=True), ForeignKey("properties.id"), nullable=False, index=True)
+    property_id = Column(UUID(as_uuid=True), nullable=False)
+    property_state = Column(String(2), primary_key=True)  # Partition key, the property's state
+    version = Column(Integer, default=1, nullable=False)  # Bumped on every re-analysis
 
     score = Column(Integer, nullable=False, index=True)
     confidence = Column(Integer, nullable=False)
     annual_kwh_potential = Column(Integer)
     panel_count = Column(Integer)
-    panel_layout = Column(JSONB)  # GeoJSON MultiPolygon
+    # GeoJSON MultiPolygon; wide, so not loaded with the row (searches leave it out)
+    panel_layout = deferred(Column(JSONB))
     system_size_kw = Column(DECIMAL(6, 2))
     estimated_cost = Column(Integer)
     annual_savings = Column(Integer)
@@ -122,7 +175,8 @@ class SolarFitAnalysis(Base):
     # Relationship
     property = relationship("Property", back_populates="solarfit")
 
-    __table_args__ = (
+    __table_args__ = _property_partitioned(
+        _latest_per_property(),
         CheckConstraint("score >= 0 AND score <= 100", name="valid_score"),
         CheckConstraint("confidence >= 0 AND confidence <= 100", name="valid_confidence"),
     )
@@ -132,7 +186,9 @@ class DrivewayProAnalysis(Base):
     __tablename__ = "drivewaypro_analyses"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    property_id = Column(UUID(as_uuid=True), ForeignKey("properties.id"), nullable=False, index=True)
+    property_id = Column(UUID(as_uuid=True), nullable=False)
+    property_state = Column(String(2), primary_key=True)  # Partition key, the property's state
+    version = Column(Integer, default=1, nullable=False)  # Bumped on every re-analysis
 
     condition = Column(Enum(RoofCondition), nullable=False)
     confidence = Column(Integer, nullable=False)
@@ -149,14 +205,19 @@ class DrivewayProAnalysis(Base):
     # Relationship
     property = relationship("Property", back_populates="drivewaypro")
 
+    __table_args__ = _property_partitioned(_latest_per_property())
+
 
 class PermitScopeAnalysis(Base):
     __tablename__ = "permitscope_analyses"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    property_id = Column(UUID(as_uuid=True), ForeignKey("properties.id"), nullable=False, index=True)
+    property_id = Column(UUID(as_uuid=True), nullable=False)
+    property_state = Column(String(2), primary_key=True)  # Partition key, the property's state
+    version = Column(Integer, default=1, nullable=False)  # Bumped on every re-analysis
 
-    recent_permits = Column(JSONB)  # Array of permit objects
+    # Array of permit objects (frontend Permit type); wide, so not loaded with the row
+    recent_permits = deferred(Column(JSONB))
     total_permits = Column(Integer)
     last_permit_date = Column(Date)
     construction_activity_score = Column(Integer)
@@ -166,3 +227,24 @@ class PermitScopeAnalysis(Base):
 
     # Relationship
     property = relationship("Property", back_populates="permitscope")
+
+    __table_args__ = _property_partitioned(_latest_per_property())
+
+
+class AnalysisHistory(Base):
+    """Append-only snapshot of every analysis version, written on each analysis flush"""
+    __tablename__ = "analysis_history"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    property_id = Column(UUID(as_uuid=True), nullable=False)
+    property_state = Column(String(2), primary_key=True)  # Partition key, the property's state
+    product = Column(String(20), nullable=False)  # roofiq, solarfit, drivewaypro, permitscope
+    analysis_id = Column(UUID(as_uuid=True), nullable=False)
+    version = Column(Integer, nullable=False)
+    analysis_date = Column(DateTime)
+    data = Column(JSONB, nullable=False)  # The analysis row's other columns
+    recorded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = _property_partitioned(
+        Index("ix_analysis_history_property", "property_id", "product", "version"),
+    )
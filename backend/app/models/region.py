@@ -0,0 +1,59 @@
+"""
+Region Aggregate Models
+
+Precomputed property summaries per region, kept current by
+app/core/region_aggregates.py.
+"""
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from app.core.database import Base
+
+
+class RegionAggregate(Base):
+    """
+    Summary of the properties in one (state, county, city, zip) region.
+
+    Every column is a count or a sum, so coarser summaries (a county, a city
+    across its zips, a whole state) are the SUM of their regions' rows;
+    averages are sum / count. Missing county, city or zip values are ''.
+    """
+    __tablename__ = "region_aggregates"
+
+    state = Column(String(2), primary_key=True)
+    county = Column(String, primary_key=True, default="")
+    city = Column(String, primary_key=True, default="")
+    zip = Column(String(10), primary_key=True, default="")
+
+    property_count = Column(Integer, nullable=False, default=0)
+
+    # SolarFit
+    solar_count = Column(Integer, nullable=False, default=0)
+    solar_score_sum = Column(BigInteger, nullable=False, default=0)
+
+    # RoofIQ condition distribution
+    roof_excellent = Column(Integer, nullable=False, default=0)
+    roof_good = Column(Integer, nullable=False, default=0)
+    roof_fair = Column(Integer, nullable=False, default=0)
+    roof_poor = Column(Integer, nullable=False, default=0)
+
+    # PermitScope
+    permit_count = Column(Integer, nullable=False, default=0)  # Properties with permit data
+    total_permits = Column(BigInteger, nullable=False, default=0)
+    recent_permit_count = Column(Integer, nullable=False, default=0)  # Permit within REGION_RECENT_PERMIT_DAYS
+    construction_activity_count = Column(Integer, nullable=False, default=0)
+    construction_activity_sum = Column(BigInteger, nullable=False, default=0)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class RegionRefresh(Base):
+    """A region whose aggregate is stale, queued by property and analysis writes"""
+    __tablename__ = "region_refresh_queue"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    state = Column(String(2), nullable=False)
+    county = Column(String, nullable=False, default="")
+    city = Column(String, nullable=False, default="")
+    zip = Column(String(10), nullable=False, default="")
+    queued_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -60,14 +60,19 @@ class SavedSearch(Base):
 
 
 class SearchAlert(Base):
-    """Alert history for saved searches"""
+    """
+    Alert history for saved searches.
+
+    Range-partitioned by month of sent_at; expired months are dropped by the
+    maintain_partitions task (see migrations/002_partition_history_by_month.sql).
+    """
     __tablename__ = "search_alerts"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     saved_search_id = Column(UUID(as_uuid=True), ForeignKey("saved_searches.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Alert details
-    sent_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Partition key
     property_count = Column(Integer, nullable=False)
     property_ids = Column(JSON, nullable=False)  # List of property UUIDs included in alert
 
@@ -84,6 +89,8 @@ class SearchAlert(Base):
     # Relationships
     saved_search = relationship("SavedSearch", back_populates="alert_history")
 
+    __table_args__ = {"postgresql_partition_by": "RANGE (sent_at)"}
+
     def __repr__(self):
         return f"<SearchAlert(id={self.id}, search_id={self.saved_search_id}, sent_at={self.sent_at})>"
 
@@ -102,11 +109,11 @@ class UserEmailPreference(Base):
 
     # Digest preferences
     daily_digest_enabled = Column(Boolean, default=True, nullable=False)
-    daily_digest_time = Column(Integer, default=9, CheckConstraint("daily_digest_time >= 0 AND daily_digest_time <= 23"))
+    daily_digest_time = Column(Integer, CheckConstraint("daily_digest_time >= 0 AND daily_digest_time <= 23"), default=9)
 
     weekly_digest_enabled = Column(Boolean, default=False, nullable=False)
-    weekly_digest_day = Column(Integer, default=1, CheckConstraint("weekly_digest_day >= 0 AND weekly_digest_day <= 6"))
-    weekly_digest_time = Column(Integer, default=9, CheckConstraint("weekly_digest_time >= 0 AND weekly_digest_time <= 23"))
+    weekly_digest_day = Column(Integer, CheckConstraint("weekly_digest_day >= 0 AND weekly_digest_day <= 6"), default=1)
+    weekly_digest_time = Column(Integer, CheckConstraint("weekly_digest_time >= 0 AND weekly_digest_time <= 23"), default=9)
 
     # Unsubscribe
     unsubscribed_at = Column(DateTime)
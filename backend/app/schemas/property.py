@@ -1,9 +1,38 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional, List
 from datetime import datetime, date
 from decimal import Decimal
 from uuid import UUID
 
+from sqlalchemy import inspect
+
+# Wide analysis fields search results leave out unless listed in include
+IncludeField = Literal["panel_layout", "recent_permits"]
+
+
+class _LoadedAttributes:
+    """An ORM row whose attributes not loaded from the database read as missing"""
+
+    def __init__(self, obj, state, **extra):
+        self._obj = obj
+        self._unloaded = state.unloaded
+        self._extra = extra
+
+    def __getattr__(self, name):
+        if name in self._extra:
+            return self._extra[name]
+        if name in self._unloaded:
+            raise AttributeError(name)
+        return getattr(self._obj, name)
+
+
+def _skip_unloaded(data, **extra):
+    """Validate ORM rows without lazy-loading their deferred columns; extra adds attributes"""
+    state = inspect(data, raiseerr=False)
+    if state is None or not hasattr(state, "unloaded"):
+        return data
+    return _LoadedAttributes(data, state, **extra)
+
 
 class PropertyFilters(BaseModel):
     """Filters for property search"""
@@ -37,6 +66,7 @@ class PropertyFilters(BaseModel):
     # PermitScope filters
     permit_activity_days: Optional[int] = None
     construction_activity_min: Optional[int] = None
+    permit_types: Optional[List[str]] = Field(None, description="Any of these permit types in recent_permits")
 
     # Pagination
     limit: int = Field(100, ge=1, le=500)
@@ -46,6 +76,9 @@ class PropertyFilters(BaseModel):
     sort_by: Optional[str] = Field(None, description="Field to sort by")
     sort_order: str = Field("asc", description="asc or desc")
 
+    # Wide analysis fields to return with each property
+    include: Optional[List[IncludeField]] = None
+
 
 class RoofIQData(BaseModel):
     condition: str
@@ -69,12 +102,12 @@ class SolarFitData(BaseModel):
     confidence: int
     annual_kwh_potential: Optional[int]
     panel_count: Optional[int]
-    panel_layout: Optional[dict]
+    panel_layout: Optional[dict] = None  # Only when loaded (detail views, include)
     system_size_kw: Optional[Decimal]
     estimated_cost: Optional[int]
     annual_savings: Optional[int]
     roi_years: Optional[Decimal]
-    shading_analysis: Optional[dict]
+    shading_analysis: Optional[dict] = None
     orientation: Optional[str]
     tilt_degrees: Optional[Decimal]
     analysis_date: datetime
@@ -82,17 +115,17 @@ class SolarFitData(BaseModel):
     class Config:
         from_attributes = True
 
-    @validator('shading_analysis', pre=True, always=True)
-    def build_shading_analysis(cls, v, values):
-        """Build shading_analysis dict from individual fields"""
-        if v is not None:
-            return v
-        return {
-            'spring': values.get('shading_spring'),
-            'summer': values.get('shading_summer'),
-            'fall': values.get('shading_fall'),
-            'winter': values.get('shading_winter'),
-        }
+    @model_validator(mode="before")
+    @classmethod
+    def build_shading_analysis(cls, data):
+        """Build shading_analysis dict from the row's individual fields"""
+        if not hasattr(data, "shading_spring"):
+            return _skip_unloaded(data)
+        shading = {}
+        for season in ('spring', 'summer', 'fall', 'winter'):
+            value = getattr(data, f"shading_{season}")
+            shading[season] = float(value) if value is not None else None
+        return _skip_unloaded(data, shading_analysis=shading)
 
 
 class DrivewayProData(BaseModel):
@@ -112,7 +145,7 @@ class DrivewayProData(BaseModel):
 
 
 class PermitScopeData(BaseModel):
-    recent_permits: Optional[List[dict]]
+    recent_permits: Optional[List[dict]] = None  # Only when loaded (detail views, include)
     total_permits: Optional[int]
     last_permit_date: Optional[date]
     construction_activity_score: Optional[int]
@@ -122,6 +155,11 @@ class PermitScopeData(BaseModel):
     class Config:
         from_attributes = True
 
+    @model_validator(mode="before")
+    @classmethod
+    def skip_unloaded(cls, data):
+        return _skip_unloaded(data)
+
 
 class PropertyResponse(BaseModel):
     id: UUID
@@ -130,8 +168,8 @@ class PropertyResponse(BaseModel):
     state: Optional[str]
     zip: Optional[str]
     county: Optional[str]
-    latitude: Decimal
-    longitude: Decimal
+    latitude: float
+    longitude: float
     property_type: str
     geometry: dict  # GeoJSON Polygon
 
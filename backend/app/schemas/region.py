@@ -0,0 +1,46 @@
+"""
+Region Schemas
+
+Pydantic schemas for per-region property summaries.
+"""
+from datetime import datetime
+from typing import Optional, List
+from pydantic import BaseModel
+
+
+class RoofConditionCounts(BaseModel):
+    """Properties per RoofIQ roof condition"""
+    excellent: int
+    good: int
+    fair: int
+    poor: int
+
+
+class PermitActivity(BaseModel):
+    """PermitScope activity of a region's properties"""
+    properties_with_permits: int
+    total_permits: int
+    recent_permit_properties: int  # A permit within REGION_RECENT_PERMIT_DAYS
+    avg_construction_activity: Optional[float]
+
+
+class RegionSummary(BaseModel):
+    """Summary of one region; the location fields below the requested level are null"""
+    state: str
+    county: Optional[str] = None
+    city: Optional[str] = None
+    zip: Optional[str] = None
+
+    property_count: int
+    solar_analyzed: int
+    avg_solar_score: Optional[float]
+    roof_condition: RoofConditionCounts
+    permits: PermitActivity
+
+    refreshed_at: datetime  # Oldest refresh among the region's rows
+
+
+class RegionSummaryListResponse(BaseModel):
+    """Schema for a list of region summaries"""
+    regions: List[RegionSummary]
+    total: int
@@ -0,0 +1,397 @@
+"""
+Property Search Service
+
+Cached property search shared by the search API and cache warming.
+"""
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+from uuid import UUID
+import json
+import logging
+import time
+
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.core.cache import cache, MISSING
+from app.core.config import settings
+from app.core.invalidation import search_generation_key, search_tag
+from app.models.property import (
+    Property,
+    RoofIQAnalysis,
+    SolarFitAnalysis,
+    DrivewayProAnalysis,
+    PermitScopeAnalysis,
+)
+from app.schemas.property import PropertyFilters, PropertyResponse
+
+logger = logging.getLogger(__name__)
+
+# Daily counters of search signatures, used to pick searches to warm
+POPULAR_PREFIX = "property_search:popular"
+
+# Deferred analysis columns behind each include field
+INCLUDE_COLUMNS = {
+    "panel_layout": (Property.solarfit, SolarFitAnalysis.panel_layout),
+    "recent_permits": (Property.permitscope, PermitScopeAnalysis.recent_permits),
+}
+
+# Encoded PropertyResponse bodies: full detail, and without the include fields
+DETAIL_PREFIX = "property"
+SUMMARY_PREFIX = "property_summary"
+
+
+class PropertySearchService:
+    """Property search backed by cached, page-independent result sets"""
+
+    def build_query(self, filters: PropertyFilters):
+        """Build the ordered (id, longitude, latitude) query for a filter set"""
+        query = select(Property.id, Property.longitude, Property.latitude)
+
+        conditions = []
+
+        # Location filters
+        if filters.city:
+            conditions.append(Property.city.ilike(f"%{filters.city}%"))
+
+        if filters.state:
+            conditions.append(Property.state == filters.state.upper())
+
+        if filters.zip:
+            conditions.append(Property.zip == filters.zip)
+
+        if filters.county:
+            conditions.append(Property.county.ilike(f"%{filters.county}%"))
+
+        if filters.bounds:
+            # Bounding box filter
+            west, south, east, north = filters.bounds
+            conditions.append(and_(
+                Property.longitude >= west,
+                Property.longitude <= east,
+                Property.latitude >= south,
+                Property.latitude <= north
+            ))
+
+        # Property type filter
+        if filters.property_type:
+            conditions.append(Property.property_type == filters.property_type)
+
+        # RoofIQ filters (requires join)
+        roof_conditions = []
+        if filters.roof_condition:
+            roof_conditions.append(RoofIQAnalysis.condition.in_(filters.roof_condition))
+
+        if filters.roof_age_years_max:
+            roof_conditions.append(RoofIQAnalysis.age_years <= filters.roof_age_years_max)
+
+        if filters.roof_age_years_min:
+            roof_conditions.append(RoofIQAnalysis.age_years >= filters.roof_age_years_min)
+
+        if filters.roof_material:
+            roof_conditions.append(RoofIQAnalysis.material.in_(filters.roof_material))
+
+        if roof_conditions or filters.sort_by == 'roof_age':
+            query = query.join(RoofIQAnalysis)
+            conditions.extend(roof_conditions)
+
+        # SolarFit filters
+        solar_conditions = []
+        if filters.solar_score_min is not None:
+            solar_conditions.append(SolarFitAnalysis.score >= filters.solar_score_min)
+
+        if filters.solar_score_max is not None:
+            solar_conditions.append(SolarFitAnalysis.score <= filters.solar_score_max)
+
+        if filters.panel_count_min:
+            solar_conditions.append(SolarFitAnalysis.panel_count >= filters.panel_count_min)
+
+        if filters.roi_years_max:
+            solar_conditions.append(SolarFitAnalysis.roi_years <= filters.roi_years_max)
+
+        if solar_conditions or filters.sort_by == 'solar_score':
+            query = query.join(SolarFitAnalysis)
+            conditions.extend(solar_conditions)
+
+        # DrivewayPro filters
+        driveway_conditions = []
+        if filters.driveway_condition:
+            driveway_conditions.append(DrivewayProAnalysis.condition.in_(filters.driveway_condition))
+
+        if filters.driveway_sealing_recommended is not None:
+            driveway_conditions.append(
+                DrivewayProAnalysis.sealing_recommended == filters.driveway_sealing_recommended
+            )
+
+        if driveway_conditions:
+            query = query.join(DrivewayProAnalysis)
+            conditions.extend(driveway_conditions)
+
+        # PermitScope filters
+        permit_conditions = []
+        if filters.permit_activity_days:
+            since = date.today() - timedelta(days=filters.permit_activity_days)
+            permit_conditions.append(PermitScopeAnalysis.last_permit_date >= since)
+
+        if filters.construction_activity_min is not None:
+            permit_conditions.append(
+                PermitScopeAnalysis.construction_activity_score >= filters.construction_activity_min
+            )
+
+        if filters.permit_types:
+            # Containment (@>) on recent_permits is served by its GIN index
+            permit_conditions.append(or_(*(
+                PermitScopeAnalysis.recent_permits.contains([{"permit_type": permit_type}])
+                for permit_type in filters.permit_types
+            )))
+
+        if permit_conditions:
+            query = query.join(PermitScopeAnalysis)
+            conditions.extend(permit_conditions)
+
+        # Apply all conditions
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        # Apply sorting (id tie-breaker keeps page slices stable)
+        if filters.sort_by == 'solar_score':
+            order_col = SolarFitAnalysis.score
+        elif filters.sort_by == 'roof_age':
+            order_col = RoofIQAnalysis.age_years
+        else:
+            order_col = Property.updated_at
+
+        if filters.sort_order == 'desc':
+            return query.order_by(order_col.desc(), Property.id)
+        return query.order_by(order_col.asc(), Property.id)
+
+    def stored_filter_conditions(self, filters: dict) -> list:
+        """
+        Conditions for a filter dict stored on a saved search or audience.
+
+        Used by search alerts and audience syncs, which match exact location
+        values rather than the search API's partial text matches.
+        """
+        conditions = []
+
+        # Location filters
+        if filters.get("city"):
+            conditions.append(Property.city == filters["city"])
+        if filters.get("state"):
+            conditions.append(Property.state == filters["state"].upper())
+        zip_code = filters.get("zip") or filters.get("zip_code")  # zip_code: older saved filters
+        if zip_code:
+            conditions.append(Property.zip == zip_code)
+
+        # Bounding box filter
+        if filters.get("bounds"):
+            west, south, east, north = filters["bounds"]
+            conditions.append(and_(
+                Property.longitude >= west,
+                Property.longitude <= east,
+                Property.latitude >= south,
+                Property.latitude <= north
+            ))
+
+        # Property type filter (one type, or a list of types)
+        property_type = filters.get("property_type")
+        if property_type:
+            if isinstance(property_type, str):
+                property_type = [property_type]
+            conditions.append(Property.property_type.in_(property_type))
+
+        return conditions
+
+    def result_set_key(self, filters: PropertyFilters) -> str:
+        """Cache key for a filter+sort signature, independent of pagination"""
+        return cache.generate_cache_key(
+            "property_search", **filters.dict(exclude={"limit", "offset", "include"})
+        )
+
+    def property_options(self, include: Iterable[str] = ()) -> list:
+        """Loader options for PropertyResponse, loading the deferred columns of include"""
+        undeferred = [INCLUDE_COLUMNS[name] for name in include]
+        options = []
+        for relationship in (Property.roofiq, Property.solarfit, Property.drivewaypro, Property.permitscope):
+            load = joinedload(relationship)
+            columns = [column for rel, column in undeferred if rel is relationship]
+            if columns:
+                load = load.undefer(*columns)
+            options.append(load)
+        return options
+
+    async def load_result_set(self, db: AsyncSession, filters: PropertyFilters) -> dict:
+        """
+        Run a search once and return its ordered rows and total.
+
+        Rows are [id, longitude, latitude] so any page can be served and centered
+        without touching the database. Result sets larger than
+        CACHE_SEARCH_RESULT_MAX_IDS keep only the leading rows.
+        """
+        max_ids = settings.CACHE_SEARCH_RESULT_MAX_IDS
+        query = self.build_query(filters)
+
+        result = await db.execute(query.limit(max_ids + 1))
+        rows = [[str(r.id), r.longitude, r.latitude] for r in result]
+
+        truncated = len(rows) > max_ids
+        if truncated:
+            rows = rows[:max_ids]
+            count_query = select(func.count()).select_from(query.order_by(None).subquery())
+            total = (await db.execute(count_query)).scalar_one()
+        else:
+            total = len(rows)
+
+        return {"rows": rows, "total": total, "truncated": truncated}
+
+    async def get_result_set(
+        self,
+        db: AsyncSession,
+        filters: PropertyFilters,
+        ttl: Optional[int] = None,
+        refresh: bool = False,
+    ) -> dict:
+        """
+        Get the cached result set for filters, loading and caching it on a miss.
+
+        The entry is keyed by the search generation read before the database,
+        so a write committed meanwhile leaves it under a key no longer read.
+        A result set read from a replica within DATABASE_REPLICA_MAX_LAG_SECONDS
+        of the generation's start may predate its write and isn't cached.
+        """
+        generation = await cache.get_raw(search_generation_key(filters.state))
+        key = f"{self.result_set_key(filters)}:{generation or 0}"
+
+        if not refresh:
+            result_set = await cache.get(key)
+            if result_set is not None:
+                return result_set
+
+        ttl = ttl or settings.CACHE_PROPERTY_SEARCH_TTL
+        result_set = await self.load_result_set(db, filters)
+
+        if (
+            db.info.get("replica")
+            and generation
+            and time.time() - float(generation) < settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+        ):
+            return result_set
+
+        await cache.set(key, result_set, ttl)
+        await cache.tag(key, [search_tag(filters.state)], ttl)
+        return result_set
+
+    async def load_payloads(
+        self,
+        db: AsyncSession,
+        property_ids: List[str],
+        include: Iterable[str] = (),
+    ) -> dict:
+        """Encode PropertyResponse bodies for ids from the database, by id"""
+        query = select(Property).where(Property.id.in_([UUID(pid) for pid in property_ids]))
+        result = await db.execute(query.options(*self.property_options(include)))
+        return {
+            str(p.id): PropertyResponse.model_validate(p).model_dump_json()
+            for p in result.unique().scalars()
+        }
+
+    async def property_payloads(
+        self,
+        db: AsyncSession,
+        property_ids: List[str],
+        include: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Get encoded PropertyResponse bodies for ids, in order.
+
+        Without include, bodies leave out the wide include fields and are
+        cached as property_summary:{id}. With include, they are the shared
+        property:{id} detail entries, which carry every field. Reads the
+        entries in one round trip and loads only the misses from the
+        database, writing them back for later pages.
+        """
+        prefix = DETAIL_PREFIX if include else SUMMARY_PREFIX
+        cached = await cache.mget([f"{prefix}:{pid}" for pid in property_ids], raw=True)
+        bodies = dict(zip(property_ids, cached))
+
+        missing = [pid for pid, body in bodies.items() if body is None or body == MISSING]
+        if missing:
+            fetched = await self.load_payloads(db, missing, INCLUDE_COLUMNS if include else ())
+            bodies.update(fetched)
+            await cache.backfill(
+                (f"{prefix}:{pid}", body, settings.CACHE_PROPERTY_DETAIL_TTL)
+                for pid, body in fetched.items()
+            )
+
+        # Skip rows deleted since the result set was cached
+        return [bodies[pid] for pid in property_ids if bodies.get(pid) not in (None, MISSING)]
+
+    async def search(self, db: AsyncSession, filters: PropertyFilters) -> str:
+        """Run a search and return the encoded PropertySearchResponse body"""
+        result_set = await self.get_result_set(db, filters)
+
+        start, end = filters.offset, filters.offset + filters.limit
+        rows = result_set["rows"][start:end]
+
+        # Pages past the cached prefix of a truncated result set go to the database
+        if result_set["truncated"] and end > len(result_set["rows"]):
+            result = await db.execute(self.build_query(filters).limit(filters.limit).offset(start))
+            rows = [[str(r.id), r.longitude, r.latitude] for r in result]
+
+        payloads = await self.property_payloads(db, [row[0] for row in rows], filters.include)
+
+        # Calculate center point
+        center = None
+        if rows:
+            avg_lng = sum(row[1] for row in rows) / len(rows)
+            avg_lat = sum(row[2] for row in rows) / len(rows)
+            center = [avg_lng, avg_lat]
+
+        # Assemble the PropertySearchResponse body from pre-encoded properties
+        meta = json.dumps({
+            "total": result_set["total"],
+            "limit": filters.limit,
+            "offset": filters.offset,
+            "center": center
+        })
+        return '{"properties":[' + ",".join(payloads) + "]," + meta[1:]
+
+    async def warm(self, db: AsyncSession, filters: PropertyFilters, ttl: int) -> int:
+        """Recompute a search's result set and first page; returns the total"""
+        result_set = await self.get_result_set(db, filters, ttl=ttl, refresh=True)
+        await self.property_payloads(db, [row[0] for row in result_set["rows"][:filters.limit]])
+        return result_set["total"]
+
+    async def record_search(self, filters: PropertyFilters):
+        """Count a search signature towards today's popular searches"""
+        key = self.result_set_key(filters)
+        counter = f"{POPULAR_PREFIX}:{datetime.utcnow():%Y%m%d}"
+        ttl = settings.CACHE_WARM_LOOKBACK_DAYS * 86400
+
+        async with cache.pipeline() as pipe:
+            if pipe is None:
+                return
+            pipe.zincrby(counter, 1, key)
+            pipe.expire(counter, ttl)
+            # Keep the filters so the warmer can replay the search
+            pipe.setex(f"{key}:filters", ttl, filters.model_dump_json(exclude={"limit", "offset", "include"}))
+
+    async def popular_searches(self, limit: int) -> List[PropertyFilters]:
+        """Most frequent search signatures over CACHE_WARM_LOOKBACK_DAYS"""
+        today = datetime.utcnow()
+        counters = [
+            f"{POPULAR_PREFIX}:{today - timedelta(days=days):%Y%m%d}"
+            for days in range(settings.CACHE_WARM_LOOKBACK_DAYS)
+        ]
+        keys = [key for key, _ in await cache.top_hits(counters, limit)]
+
+        filters = []
+        for key, saved in zip(keys, await cache.mget([f"{key}:filters" for key in keys])):
+            if saved:
+                filters.append(PropertyFilters(**saved))
+        return filters
+
+
+# Singleton instance
+property_search_service = PropertySearchService()
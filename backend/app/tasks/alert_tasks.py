@@ -3,17 +3,19 @@ Alert Tasks
 
 Celery tasks for processing saved search alerts.
 """
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Any
 from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import joinedload
 import logging
 
 from app.tasks.celery_app import celery_app
+from app.tasks.event_loop import run_async
 from app.core.database import AsyncSessionLocal
 from app.models.saved_search import SavedSearch, SearchAlert, AlertFrequency
 from app.models.property import Property
 from app.services.email_service import email_service
+from app.services.property_search import property_search_service
 from app.core.cache import cache
 
 logger = logging.getLogger(__name__)
@@ -22,8 +24,7 @@ logger = logging.getLogger(__name__)
 @celery_app.task(name="app.tasks.alert_tasks.check_instant_alerts")
 def check_instant_alerts():
     """Check and process instant alerts (every 5 minutes)"""
-    import asyncio
-    return asyncio.run(_check_instant_alerts())
+    return run_async(_check_instant_alerts())
 
 
 async def _check_instant_alerts():
@@ -58,8 +59,7 @@ async def _check_instant_alerts():
 @celery_app.task(name="app.tasks.alert_tasks.process_daily_alerts")
 def process_daily_alerts():
     """Process daily alerts at configured times"""
-    import asyncio
-    return asyncio.run(_process_daily_alerts())
+    return run_async(_process_daily_alerts())
 
 
 async def _process_daily_alerts():
@@ -97,8 +97,7 @@ async def _process_daily_alerts():
 @celery_app.task(name="app.tasks.alert_tasks.process_weekly_alerts")
 def process_weekly_alerts():
     """Process weekly alerts on configured day"""
-    import asyncio
-    return asyncio.run(_process_weekly_alerts())
+    return run_async(_process_weekly_alerts())
 
 
 async def _process_weekly_alerts():
@@ -138,8 +137,7 @@ async def _process_weekly_alerts():
 @celery_app.task(name="app.tasks.alert_tasks.process_monthly_alerts")
 def process_monthly_alerts():
     """Process monthly alerts on configured day"""
-    import asyncio
-    return asyncio.run(_process_monthly_alerts())
+    return run_async(_process_monthly_alerts())
 
 
 async def _process_monthly_alerts():
@@ -195,29 +193,7 @@ async def _process_search_alert(session, search: SavedSearch):
         )
 
         # Apply filters
-        conditions = []
-
-        # Location filters
-        if filters.get('city'):
-            conditions.append(Property.city == filters['city'])
-        if filters.get('state'):
-            conditions.append(Property.state == filters['state'])
-        if filters.get('zip_code'):
-            conditions.append(Property.zip_code == filters['zip_code'])
-
-        # Bounding box filter
-        if filters.get('bounds'):
-            west, south, east, north = filters['bounds']
-            conditions.append(and_(
-                Property.longitude >= west,
-                Property.longitude <= east,
-                Property.latitude >= south,
-                Property.latitude <= north
-            ))
-
-        # Property type filter
-        if filters.get('property_type'):
-            conditions.append(Property.property_type.in_(filters['property_type']))
+        conditions = property_search_service.stored_filter_conditions(filters)
 
         # Only get properties updated since last check
         if search.last_checked_at:
@@ -287,41 +263,10 @@ async def _process_search_alert(session, search: SavedSearch):
         raise
 
 
-@celery_app.task(name="app.tasks.alert_tasks.cleanup_old_alerts")
-def cleanup_old_alerts():
-    """Cleanup alert history older than 90 days"""
-    import asyncio
-    return asyncio.run(_cleanup_old_alerts())
-
-
-async def _cleanup_old_alerts():
-    """Async implementation of alert cleanup"""
-    async with AsyncSessionLocal() as session:
-        try:
-            cutoff_date = datetime.utcnow() - timedelta(days=90)
-
-            # Delete old alerts
-            from sqlalchemy import delete
-            stmt = delete(SearchAlert).where(SearchAlert.sent_at < cutoff_date)
-            result = await session.execute(stmt)
-            await session.commit()
-
-            deleted_count = result.rowcount
-            logger.info(f"Cleaned up {deleted_count} old alerts")
-
-            return {"deleted": deleted_count}
-
-        except Exception as e:
-            logger.error(f"Error cleaning up old alerts: {str(e)}")
-            await session.rollback()
-            raise
-
-
 @celery_app.task(name="app.tasks.alert_tasks.send_test_alert")
 def send_test_alert(search_id: str, recipient_email: str = None):
     """Send a test alert for a saved search"""
-    import asyncio
-    return asyncio.run(_send_test_alert(search_id, recipient_email))
+    return run_async(_send_test_alert(search_id, recipient_email))
 
 
 async def _send_test_alert(search_id: str, recipient_email: str = None):
@@ -0,0 +1,138 @@
+"""
+Cache Tasks
+
+Celery tasks for maintaining cache-side data structures.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import select
+import asyncio
+import json
+import logging
+import time
+
+from app.tasks.celery_app import celery_app
+from app.tasks.event_loop import run_async
+from app.core.database import AsyncSessionLocal
+from app.core.bloom import property_filter
+from app.core.config import settings
+from app.models.property import Property
+from app.models.saved_search import SavedSearch
+from app.schemas.property import PropertyFilters
+from app.services.property_search import property_search_service
+
+logger = logging.getLogger(__name__)
+
+# How far before a rebuild's start a property's created_at may lie and its
+# insert still commit after the rebuild's snapshot (created_at is set at flush)
+BLOOM_REBUILD_OVERLAP = timedelta(minutes=10)
+
+
+@celery_app.task(name="app.tasks.cache_tasks.rebuild_property_filter")
+def rebuild_property_filter():
+    """Rebuild the Bloom filter of existing property ids"""
+    return run_async(_rebuild_property_filter())
+
+
+async def _rebuild_property_filter():
+    """Async implementation of property filter rebuild"""
+    if not property_filter.enabled:
+        return {"skipped": True}
+
+    try:
+        started_at = datetime.utcnow()
+        async with AsyncSessionLocal() as session:
+            bitmap = property_filter.new_bitmap()
+            count = 0
+
+            result = await session.stream_scalars(
+                select(Property.id).execution_options(yield_per=10000)
+            )
+            async for property_id in result:
+                property_filter.set_bits(bitmap, str(property_id))
+                count += 1
+
+        if count > property_filter.capacity:
+            logger.warning(
+                f"Property filter holds {count} ids, above capacity {property_filter.capacity}; "
+                f"raise PROPERTY_BLOOM_CAPACITY to keep the false positive rate"
+            )
+
+        # Expire after two missed rebuilds so a stale filter is never trusted
+        await property_filter.publish(bitmap, ttl=settings.PROPERTY_BLOOM_REBUILD_SECONDS * 2)
+
+        # Properties committed after the snapshot above had their bits set in
+        # the filter the publish just replaced; add them again. Later commits
+        # set their bits in the published filter themselves.
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Property.id).where(Property.created_at >= started_at - BLOOM_REBUILD_OVERLAP)
+            )
+            recent = [str(property_id) for property_id in result.scalars()]
+        await property_filter.add(recent)
+
+        logger.info(f"Rebuilt property filter with {count} ids, re-added {len(recent)} recent ids")
+        return {"properties": count, "recent": len(recent)}
+
+    except Exception as e:
+        logger.error(f"Error rebuilding property filter: {str(e)}")
+        raise
+
+
+@celery_app.task(name="app.tasks.cache_tasks.warm_search_cache")
+def warm_search_cache():
+    """Precompute result sets and first pages for common searches"""
+    return run_async(_warm_search_cache())
+
+
+async def _saved_search_filters(limit: int) -> List[PropertyFilters]:
+    """Filters shared by the most active saved searches"""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(SavedSearch.filters).where(SavedSearch.is_active == True)
+        )
+        counts = Counter(json.dumps(f, sort_keys=True) for f in result.scalars() if f)
+
+    return [PropertyFilters(**json.loads(f)) for f, _ in counts.most_common(limit)]
+
+
+async def _warm_search_cache():
+    """Async implementation of search cache warming"""
+    try:
+        candidates = await _saved_search_filters(settings.CACHE_WARM_SAVED_SEARCHES)
+        candidates += await property_search_service.popular_searches(
+            settings.CACHE_WARM_POPULAR_SEARCHES
+        )
+
+        # Saved and popular searches often overlap
+        unique = {property_search_service.result_set_key(f): f for f in candidates}
+
+        deadline = time.monotonic() + settings.CACHE_WARM_TIME_BUDGET_SECONDS
+        semaphore = asyncio.Semaphore(settings.CACHE_WARM_CONCURRENCY)
+
+        async def warm(filters: PropertyFilters) -> bool:
+            async with semaphore:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                async with AsyncSessionLocal() as session:
+                    try:
+                        await asyncio.wait_for(
+                            property_search_service.warm(session, filters, settings.CACHE_WARM_TTL),
+                            timeout=remaining,
+                        )
+                        return True
+                    except Exception as e:
+                        logger.warning(f"Error warming search {filters.model_dump(exclude_none=True)}: {str(e)}")
+                        return False
+
+        results = await asyncio.gather(*(warm(f) for f in unique.values()))
+        warmed = sum(results)
+
+        logger.info(f"Warmed {warmed} of {len(unique)} searches")
+        return {"warmed": warmed, "candidates": len(unique)}
+
+    except Exception as e:
+        logger.error(f"Error warming search cache: {str(e)}")
+        raise
@@ -5,13 +5,25 @@ Background task queue configuration for processing saved search alerts.
 """
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_prerun
 from app.core.config import settings
+from app.core import query_log
+from app.core import invalidation  # noqa: F401  (registers cache invalidation session events)
+from app.core import analysis_history  # noqa: F401  (registers analysis history session events)
+from app.core import region_aggregates  # noqa: F401  (registers region refresh session events)
 
 # Create Celery app
 celery_app = Celery(
     "evoteli_tasks",
     broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=[
+        "app.tasks.alert_tasks",
+        "app.tasks.google_ads_tasks",
+        "app.tasks.cache_tasks",
+        "app.tasks.maintenance_tasks",
+        "app.tasks.region_tasks",
+    ],
 )
 
 # Celery configuration
@@ -50,17 +62,48 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.alert_tasks.process_monthly_alerts",
         "schedule": crontab(hour=9, minute=0, day_of_month=1),
     },
-    # Cleanup old alerts (keep last 90 days)
-    "cleanup-old-alerts": {
-        "task": "app.tasks.alert_tasks.cleanup_old_alerts",
+    # Create upcoming monthly partitions of alert and sync history, drop expired ones
+    "maintain-partitions": {
+        "task": "app.tasks.maintenance_tasks.maintain_partitions",
         "schedule": crontab(hour=2, minute=0),  # Daily at 2 AM UTC
     },
+    # Rewrite property partitions whose rows have drifted out of geohash order
+    "recluster-properties": {
+        "task": "app.tasks.maintenance_tasks.recluster_properties",
+        "schedule": crontab(hour=3, minute=0, day_of_week=0),  # Sunday at 3 AM UTC
+    },
+    # Recompute the aggregates of regions queued by property and analysis writes
+    "refresh-region-aggregates": {
+        "task": "app.tasks.region_tasks.refresh_region_aggregates",
+        "schedule": crontab(minute="*"),  # Every minute
+    },
+    # Recompute every region, moving the recent-permit window forward
+    "rebuild-region-aggregates": {
+        "task": "app.tasks.region_tasks.rebuild_region_aggregates",
+        "schedule": crontab(hour=4, minute=0),  # Daily at 4 AM UTC
+    },
     # Process Google Ads auto-sync audiences every hour
     "process-auto-sync-audiences": {
         "task": "app.tasks.google_ads_tasks.process_auto_sync_audiences",
         "schedule": crontab(minute=0),  # Every hour
     },
+    # Rebuild the property existence filter (no-op unless enabled)
+    "rebuild-property-filter": {
+        "task": "app.tasks.cache_tasks.rebuild_property_filter",
+        "schedule": settings.PROPERTY_BLOOM_REBUILD_SECONDS,
+    },
+    # Warm popular and saved searches before the morning peak
+    "warm-search-cache": {
+        "task": "app.tasks.cache_tasks.warm_search_cache",
+        "schedule": crontab(hour=settings.CACHE_WARM_HOUR_UTC, minute=0),
+    },
 }
 
 # Auto-discover tasks
 celery_app.autodiscover_tasks(["app.tasks"])
+
+
+@task_prerun.connect
+def attribute_queries(task=None, **kwargs):
+    """Tag SQL issued by a task with its name for the slow-query log"""
+    query_log.set_source(f"task {task.name}")
@@ -0,0 +1,71 @@
+"""
+Worker Event Loop
+
+One long-lived event loop per Celery worker process.
+
+Pooled asyncpg connections and Redis clients belong to the loop that opened
+them. Running every task on the same loop lets them be reused across tasks,
+instead of being reopened (or failing) under a fresh asyncio.run() loop.
+
+Workers must use the prefork (default) or solo pool; the thread-based pools
+would share one loop between threads.
+"""
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import logging
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.core.cache import cache
+from app.core.database import engine, replica_engines
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """This process's event loop, created on first use"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(awaitable: Awaitable[T]) -> T:
+    """Run a task's coroutine to completion on the worker's event loop"""
+    loop = get_loop()
+    if not cache.connected:
+        loop.run_until_complete(cache.connect())
+    return loop.run_until_complete(awaitable)
+
+
+async def _close_connections():
+    await cache.disconnect()
+    for async_engine in (engine, *replica_engines):
+        await async_engine.dispose()
+
+
+@worker_process_init.connect
+def _init_worker(**kwargs):
+    """Forget pooled connections inherited from the parent process"""
+    global _loop
+    for async_engine in (engine, *replica_engines):
+        async_engine.sync_engine.dispose(close=False)
+    _loop = None
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker(**kwargs):
+    """Close this process's connections and its loop"""
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        _loop.run_until_complete(_close_connections())
+    except Exception as e:
+        logger.warning(f"Error closing worker connections: {str(e)}")
+    finally:
+        _loop.close()
@@ -10,6 +10,7 @@ from sqlalchemy.orm import joinedload
 import logging
 
 from app.tasks.celery_app import celery_app
+from app.tasks.event_loop import run_async
 from app.core.database import AsyncSessionLocal
 from app.models.google_ads import (
     GoogleAdsAccount,
@@ -19,6 +20,7 @@ from app.models.google_ads import (
 )
 from app.models.property import Property
 from app.services.google_ads_service import google_ads_service
+from app.services.property_search import property_search_service
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +28,7 @@ logger = logging.getLogger(__name__)
 @celery_app.task(name="app.tasks.google_ads_tasks.sync_audience_to_google_ads")
 def sync_audience_to_google_ads(audience_id: str, sync_id: Optional[str] = None):
     """Sync audience to Google Ads Customer Match"""
-    import asyncio
-    return asyncio.run(_sync_audience_to_google_ads(audience_id, sync_id))
+    return run_async(_sync_audience_to_google_ads(audience_id, sync_id))
 
 
 async def _sync_audience_to_google_ads(audience_id: str, sync_id: Optional[str] = None):
@@ -117,28 +118,7 @@ async def _sync_audience_to_google_ads(audience_id: str, sync_id: Optional[str]
             )
 
             # Apply filters
-            conditions = []
-
-            if filters.get("city"):
-                conditions.append(Property.city == filters["city"])
-            if filters.get("state"):
-                conditions.append(Property.state == filters["state"])
-            if filters.get("zip_code"):
-                conditions.append(Property.zip_code == filters["zip_code"])
-
-            if filters.get("bounds"):
-                west, south, east, north = filters["bounds"]
-                conditions.append(
-                    and_(
-                        Property.longitude >= west,
-                        Property.longitude <= east,
-                        Property.latitude >= south,
-                        Property.latitude <= north,
-                    )
-                )
-
-            if filters.get("property_type"):
-                conditions.append(Property.property_type.in_(filters["property_type"]))
+            conditions = property_search_service.stored_filter_conditions(filters)
 
             if conditions:
                 prop_query = prop_query.where(and_(*conditions))
@@ -174,8 +154,8 @@ async def _sync_audience_to_google_ads(audience_id: str, sync_id: Optional[str]
                         email_local = prop.address.lower().replace(" ", ".")[:20]
                         contact["email"] = f"{email_local}@example.com"
 
-                    if prop.zip_code:
-                        contact["zip_code"] = prop.zip_code
+                    if prop.zip:
+                        contact["zip_code"] = prop.zip
                         contact["country_code"] = "US"
 
                     if contact.get("email"):
@@ -275,8 +255,7 @@ async def _sync_audience_to_google_ads(audience_id: str, sync_id: Optional[str]
 @celery_app.task(name="app.tasks.google_ads_tasks.process_auto_sync_audiences")
 def process_auto_sync_audiences():
     """Process audiences with auto-sync enabled"""
-    import asyncio
-    return asyncio.run(_process_auto_sync_audiences())
+    return run_async(_process_auto_sync_audiences())
 
 
 async def _process_auto_sync_audiences():
@@ -0,0 +1,273 @@
+"""
+Maintenance Tasks
+
+Celery tasks for database housekeeping.
+"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+import logging
+import re
+
+from app.tasks.celery_app import celery_app
+from app.tasks.event_loop import run_async
+from app.core.database import AsyncSessionLocal
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Give up rather than queue behind long transactions on the parent table;
+# the next run retries
+LOCK_TIMEOUT = "5s"
+
+# Index whose order property partitions are CLUSTERed in
+CLUSTER_INDEX = "ix_properties_geohash"
+
+# Partitions too small to be worth rewriting
+CLUSTER_MIN_ROWS = 1000
+
+
+def _retention_days() -> dict[str, int]:
+    """Monthly range-partitioned tables and how long their rows are kept"""
+    return {
+        "search_alerts": settings.SEARCH_ALERT_RETENTION_DAYS,
+        "audience_sync_history": settings.AUDIENCE_SYNC_HISTORY_RETENTION_DAYS,
+    }
+
+
+# Column each monthly partitioned table is range-partitioned on
+PARTITION_COLUMNS = {
+    "search_alerts": "sent_at",
+    "audience_sync_history": "started_at",
+}
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of a table's partition for the month starting on month"""
+    return f"{table}_y{month:%Y}m{month:%m}"
+
+
+def default_partition_name(table: str) -> str:
+    """Name of the partition catching rows outside every monthly partition"""
+    return f"{table}_default"
+
+
+async def _monthly_partitions(session, table: str) -> dict[date, str]:
+    """Existing monthly partitions of table, by first day of month"""
+    result = await session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    )
+    partitions = {}
+    for name in result.scalars():
+        match = re.fullmatch(rf"{table}_y(\d{{4}})m(\d{{2}})", name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+async def create_month_partition(session, table: str, month: date) -> int:
+    """
+    Create a table's partition for month; returns the rows moved into it.
+
+    Postgres refuses a partition whose range covers rows already in the
+    default partition, so when the default holds rows for the month it is
+    detached, the rows are moved to the new partition, and it is attached
+    again.
+    """
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    column = PARTITION_COLUMNS[table]
+    bounds = {"start": month, "end": _add_months(month, 1)}
+    create = (
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+    )
+
+    has_default = (await session.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": default}
+    )).scalar()
+    stranded = has_default and (await session.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= :start AND {column} < :end)"),
+        bounds,
+    )).scalar()
+    if not stranded:
+        await session.execute(text(create))
+        return 0
+
+    await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    await session.execute(text(create))
+    result = await session.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {column} >= :start AND {column} < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    return result.rowcount
+
+
+async def drop_partition(session, table: str, name: str):
+    """Detach and drop one partition of table"""
+    # Dropping a whole month replaces row-by-row DELETEs: no bloat, no vacuum
+    await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    await session.execute(text(f"DROP TABLE {name}"))
+
+
+async def _run_step(description: str, step) -> bool:
+    """Run one partition change in its own transaction so a failure affects only it"""
+    async with AsyncSessionLocal() as session:
+        try:
+            await session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            await step(session)
+            await session.commit()
+            return True
+
+        except Exception as e:
+            logger.error(f"Error {description}: {str(e)}")
+            await session.rollback()
+            return False
+
+
+async def maintain_monthly_partitions(table: str, retention_days: int, today: date) -> dict:
+    """
+    Create this month's and the next PARTITION_PREMAKE_MONTHS partitions and
+    drop expired ones, each in its own transaction.
+    """
+    async with AsyncSessionLocal() as session:
+        existing = await _monthly_partitions(session, table)
+    this_month = today.replace(day=1)
+
+    created, moved, dropped, failed = [], {}, [], []
+    for months in range(settings.PARTITION_PREMAKE_MONTHS + 1):
+        month = _add_months(this_month, months)
+        if month in existing:
+            continue
+        name = partition_name(table, month)
+
+        async def create(session, month=month, name=name):
+            rows = await create_month_partition(session, table, month)
+            if rows:
+                moved[name] = rows
+
+        if await _run_step(f"creating partition {name}", create):
+            created.append(name)
+        else:
+            moved.pop(name, None)
+            failed.append(name)
+
+    cutoff = today - timedelta(days=retention_days)
+    for month, name in sorted(existing.items()):
+        if _add_months(month, 1) > cutoff:
+            continue
+        if await _run_step(
+            f"dropping partition {name}",
+            lambda session, name=name: drop_partition(session, table, name),
+        ):
+            dropped.append(name)
+        else:
+            failed.append(name)
+
+    return {"created": created, "moved": moved, "dropped": dropped, "failed": failed}
+
+
+@celery_app.task(name="app.tasks.maintenance_tasks.maintain_partitions")
+def maintain_partitions():
+    """Create upcoming monthly partitions and drop expired ones (daily)"""
+    return run_async(_maintain_partitions())
+
+
+async def _maintain_partitions():
+    """Async implementation of partition maintenance"""
+    today = datetime.utcnow().date()
+    results = {}
+
+    for table, retention_days in _retention_days().items():
+        try:
+            results[table] = await maintain_monthly_partitions(table, retention_days, today)
+            logger.info(
+                f"Partitions of {table}: created {results[table]['created']}, "
+                f"moved default rows {results[table]['moved']}, dropped {results[table]['dropped']}, "
+                f"failed {results[table]['failed']}"
+            )
+
+        except Exception as e:
+            logger.error(f"Error maintaining partitions of {table}: {str(e)}")
+            results[table] = {"error": str(e)}
+
+    return results
+
+
+async def cluster_candidates(session) -> list[dict]:
+    """
+    Partitions of properties with their copy of CLUSTER_INDEX, row estimate
+    and the correlation between row order and geohash order (from the
+    planner statistics; None until the partition has been analyzed).
+    """
+    result = await session.execute(
+        text(
+            "SELECT p.relname AS partition, ic.relname AS index, p.reltuples AS rows, s.correlation "
+            "FROM pg_inherits i "
+            "JOIN pg_class p ON p.oid = i.inhrelid "
+            "JOIN pg_index x ON x.indrelid = p.oid "
+            "JOIN pg_inherits ii ON ii.inhrelid = x.indexrelid AND ii.inhparent = CAST(:index AS regclass) "
+            "JOIN pg_class ic ON ic.oid = x.indexrelid "
+            "LEFT JOIN pg_stats s ON s.schemaname = current_schema() AND s.tablename = ic.relname "
+            "WHERE i.inhparent = CAST('properties' AS regclass) "
+            "ORDER BY p.relname"
+        ),
+        {"index": CLUSTER_INDEX},
+    )
+    return [dict(row._mapping) for row in result]
+
+
+def needs_cluster(candidate: dict) -> bool:
+    if candidate["rows"] < CLUSTER_MIN_ROWS:
+        return False
+    correlation = candidate["correlation"]
+    return correlation is None or abs(correlation) < settings.PROPERTY_CLUSTER_MIN_CORRELATION
+
+
+async def cluster_partition(session, partition: str, index: str):
+    """Rewrite a partition in index order and refresh its statistics"""
+    # CLUSTER holds an exclusive lock on this partition only while it runs
+    await session.execute(text(f"CLUSTER {partition} USING {index}"))
+    await session.execute(text(f"ANALYZE {partition}"))
+
+
+@celery_app.task(name="app.tasks.maintenance_tasks.recluster_properties")
+def recluster_properties():
+    """Restore the geohash order of property partitions that have drifted (weekly)"""
+    return run_async(_recluster_properties())
+
+
+async def _recluster_properties():
+    """Async implementation of property reclustering"""
+    async with AsyncSessionLocal() as session:
+        candidates = await cluster_candidates(session)
+
+    clustered, failed = [], []
+    for candidate in filter(needs_cluster, candidates):
+        partition = candidate["partition"]
+        async with AsyncSessionLocal() as session:
+            try:
+                await session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+                await cluster_partition(session, partition, candidate["index"])
+                await session.commit()
+                clustered.append(partition)
+                logger.info(f"Clustered {partition} (correlation was {candidate['correlation']})")
+
+            except Exception as e:
+                logger.error(f"Error clustering {partition}: {str(e)}")
+                await session.rollback()
+                failed.append(partition)
+
+    return {"checked": len(candidates), "clustered": clustered, "failed": failed}
@@ -0,0 +1,77 @@
+"""
+Region Tasks
+
+Celery tasks keeping the per-region aggregates current.
+"""
+from sqlalchemy import distinct, select
+import logging
+
+from app.tasks.celery_app import celery_app
+from app.tasks.event_loop import run_async
+from app.core.database import AsyncSessionLocal
+from app.core.config import settings
+from app.core.region_aggregates import rebuild_state, refresh_queued
+from app.models.property import Property
+
+logger = logging.getLogger(__name__)
+
+# Batches one run takes before leaving the rest to the next run
+MAX_BATCHES = 20
+
+
+@celery_app.task(name="app.tasks.region_tasks.refresh_region_aggregates")
+def refresh_region_aggregates():
+    """Recompute the aggregates of regions queued by recent writes"""
+    return run_async(_refresh_region_aggregates())
+
+
+async def _refresh_region_aggregates():
+    """Async implementation of queued region refresh"""
+    refreshed = 0
+    for _ in range(MAX_BATCHES):
+        async with AsyncSessionLocal() as session:
+            try:
+                dequeued, count = await refresh_queued(session, settings.REGION_REFRESH_BATCH)
+                await session.commit()
+
+            except Exception as e:
+                logger.error(f"Error refreshing region aggregates: {str(e)}")
+                await session.rollback()
+                return {"refreshed": refreshed, "error": str(e)}
+
+        refreshed += count
+        # A short batch means the queue is drained; duplicates make count smaller
+        if dequeued < settings.REGION_REFRESH_BATCH:
+            break
+
+    if refreshed:
+        logger.info(f"Refreshed {refreshed} region aggregates")
+    return {"refreshed": refreshed}
+
+
+@celery_app.task(name="app.tasks.region_tasks.rebuild_region_aggregates")
+def rebuild_region_aggregates():
+    """Recompute every region's aggregate, one state at a time (nightly)"""
+    return run_async(_rebuild_region_aggregates())
+
+
+async def _rebuild_region_aggregates():
+    """Async implementation of the full region rebuild"""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(distinct(Property.state)))
+        states = sorted(result.scalars())
+
+    rebuilt, failed = {}, []
+    for state in states:
+        async with AsyncSessionLocal() as session:
+            try:
+                rebuilt[state] = await rebuild_state(session, state)
+                await session.commit()
+
+            except Exception as e:
+                logger.error(f"Error rebuilding region aggregates of {state}: {str(e)}")
+                await session.rollback()
+                failed.append(state)
+
+    logger.info(f"Rebuilt {sum(rebuilt.values())} region aggregates in {len(rebuilt)} states")
+    return {"states": len(states), "regions": sum(rebuilt.values()), "failed": failed}
@@ -0,0 +1,185 @@
+-- Partition properties and the analysis tables by state
+--
+-- properties becomes LIST-partitioned on state, and each analysis table on a
+-- new property_state column that a composite foreign key keeps equal to its
+-- property's state. A search filtered by state then scans one partition of
+-- each table: the planner prunes properties on the state predicate and the
+-- analysis tables through the (id, state) join. Requires PostgreSQL 15+.
+--
+-- Existing data is copied into new partitioned tables, which then take over
+-- the original names. The old tables are kept as *_unpartitioned (primary
+-- keys only) for rollback until dropped by hand. Stop writers (Celery
+-- workers, bulk imports) while this runs.
+
+BEGIN;
+
+-- state is now part of the primary key
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM properties WHERE state IS NULL) THEN
+        RAISE EXCEPTION 'properties with NULL state must be fixed before partitioning';
+    END IF;
+END $$;
+
+UPDATE properties SET state = upper(state) WHERE state <> upper(state);
+
+-- One partition per state, district and territory, plus a default for anything else
+CREATE FUNCTION pg_temp.create_state_partitions(parent text) RETURNS void AS $$
+DECLARE
+    code text;
+BEGIN
+    FOREACH code IN ARRAY ARRAY[
+        'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+        'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+        'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+        'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+        'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+        'DC', 'PR', 'VI', 'GU', 'AS', 'MP'
+    ] LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+            parent || '_' || lower(code), parent || '_partitioned', code
+        );
+    END LOOP;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent || '_partitioned');
+END $$ LANGUAGE plpgsql;
+
+-- Drop an old table's secondary indexes so the new table can reuse their names
+CREATE FUNCTION pg_temp.drop_secondary_indexes(tbl text) RETURNS void AS $$
+DECLARE
+    idx text;
+BEGIN
+    FOR idx IN
+        SELECT i.relname FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = tbl::regclass AND NOT x.indisprimary
+    LOOP
+        EXECUTE format('DROP INDEX %I', idx);
+    END LOOP;
+END $$ LANGUAGE plpgsql;
+
+
+-- properties
+
+CREATE TABLE properties_partitioned (
+    LIKE properties INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id, state)
+) PARTITION BY LIST (state);
+
+SELECT pg_temp.create_state_partitions('properties');
+
+INSERT INTO properties_partitioned SELECT * FROM properties;
+
+
+-- Analysis tables, partitioned by their property's state
+
+CREATE TABLE roofiq_analyses_partitioned (
+    LIKE roofiq_analyses INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    property_state varchar(2) NOT NULL,
+    PRIMARY KEY (id, property_state)
+) PARTITION BY LIST (property_state);
+
+CREATE TABLE solarfit_analyses_partitioned (
+    LIKE solarfit_analyses INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    property_state varchar(2) NOT NULL,
+    PRIMARY KEY (id, property_state)
+) PARTITION BY LIST (property_state);
+
+CREATE TABLE drivewaypro_analyses_partitioned (
+    LIKE drivewaypro_analyses INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    property_state varchar(2) NOT NULL,
+    PRIMARY KEY (id, property_state)
+) PARTITION BY LIST (property_state);
+
+CREATE TABLE permitscope_analyses_partitioned (
+    LIKE permitscope_analyses INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    property_state varchar(2) NOT NULL,
+    PRIMARY KEY (id, property_state)
+) PARTITION BY LIST (property_state);
+
+SELECT pg_temp.create_state_partitions('roofiq_analyses');
+SELECT pg_temp.create_state_partitions('solarfit_analyses');
+SELECT pg_temp.create_state_partitions('drivewaypro_analyses');
+SELECT pg_temp.create_state_partitions('permitscope_analyses');
+
+INSERT INTO roofiq_analyses_partitioned
+SELECT a.*, p.state FROM roofiq_analyses a JOIN properties p ON p.id = a.property_id;
+
+INSERT INTO solarfit_analyses_partitioned
+SELECT a.*, p.state FROM solarfit_analyses a JOIN properties p ON p.id = a.property_id;
+
+INSERT INTO drivewaypro_analyses_partitioned
+SELECT a.*, p.state FROM drivewaypro_analyses a JOIN properties p ON p.id = a.property_id;
+
+INSERT INTO permitscope_analyses_partitioned
+SELECT a.*, p.state FROM permitscope_analyses a JOIN properties p ON p.id = a.property_id;
+
+
+-- Swap: old tables keep their data and primary keys for rollback
+
+SELECT pg_temp.drop_secondary_indexes(t)
+FROM unnest(ARRAY['properties', 'roofiq_analyses', 'solarfit_analyses',
+                  'drivewaypro_analyses', 'permitscope_analyses']) AS t;
+
+ALTER TABLE roofiq_analyses RENAME TO roofiq_analyses_unpartitioned;
+ALTER TABLE solarfit_analyses RENAME TO solarfit_analyses_unpartitioned;
+ALTER TABLE drivewaypro_analyses RENAME TO drivewaypro_analyses_unpartitioned;
+ALTER TABLE permitscope_analyses RENAME TO permitscope_analyses_unpartitioned;
+ALTER TABLE properties RENAME TO properties_unpartitioned;
+
+ALTER TABLE properties_partitioned RENAME TO properties;
+ALTER TABLE roofiq_analyses_partitioned RENAME TO roofiq_analyses;
+ALTER TABLE solarfit_analyses_partitioned RENAME TO solarfit_analyses;
+ALTER TABLE drivewaypro_analyses_partitioned RENAME TO drivewaypro_analyses;
+ALTER TABLE permitscope_analyses_partitioned RENAME TO permitscope_analyses;
+
+DO $$
+DECLARE
+    tbl text;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['properties', 'roofiq_analyses', 'solarfit_analyses',
+                               'drivewaypro_analyses', 'permitscope_analyses'] LOOP
+        EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I',
+                       tbl || '_unpartitioned', tbl || '_pkey', tbl || '_unpartitioned_pkey');
+        EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I',
+                       tbl, tbl || '_partitioned_pkey', tbl || '_pkey');
+    END LOOP;
+END $$;
+
+ALTER TABLE roofiq_analyses ADD FOREIGN KEY (property_id, property_state)
+    REFERENCES properties (id, state) ON UPDATE CASCADE;
+ALTER TABLE solarfit_analyses ADD FOREIGN KEY (property_id, property_state)
+    REFERENCES properties (id, state) ON UPDATE CASCADE;
+ALTER TABLE drivewaypro_analyses ADD FOREIGN KEY (property_id, property_state)
+    REFERENCES properties (id, state) ON UPDATE CASCADE;
+ALTER TABLE permitscope_analyses ADD FOREIGN KEY (property_id, property_state)
+    REFERENCES properties (id, state) ON UPDATE CASCADE;
+
+
+-- Indexes (as declared on the models), created once on each parent and
+-- cascaded to every partition. A lookup by id alone uses the (id, state)
+-- primary key of each partition.
+
+CREATE INDEX ix_properties_address ON properties (address);
+CREATE INDEX ix_properties_city ON properties (city);
+CREATE INDEX ix_properties_zip ON properties (zip);
+CREATE INDEX ix_properties_property_type ON properties (property_type);
+CREATE INDEX idx_properties_geometry ON properties USING GIST (geometry);
+
+CREATE INDEX ix_roofiq_analyses_property_id ON roofiq_analyses (property_id);
+CREATE INDEX ix_roofiq_analyses_condition ON roofiq_analyses (condition);
+CREATE INDEX ix_solarfit_analyses_property_id ON solarfit_analyses (property_id);
+CREATE INDEX ix_solarfit_analyses_score ON solarfit_analyses (score);
+CREATE INDEX ix_drivewaypro_analyses_property_id ON drivewaypro_analyses (property_id);
+CREATE INDEX ix_permitscope_analyses_property_id ON permitscope_analyses (property_id);
+
+COMMIT;
+
+ANALYZE properties;
+ANALYZE roofiq_analyses;
+ANALYZE solarfit_analyses;
+ANALYZE drivewaypro_analyses;
+ANALYZE permitscope_analyses;
+
+-- Searches without a state filter can join partition by partition:
+-- ALTER DATABASE evoteli SET enable_partitionwise_join = on;
@@ -0,0 +1,84 @@
+-- Partition search_alerts and audience_sync_history by month
+--
+-- Both tables become RANGE-partitioned on their timestamp (sent_at,
+-- started_at) with one partition per month, so retention drops whole
+-- partitions (maintain_partitions task) instead of running DELETEs that
+-- bloat the table and compete with alert writes. A default partition catches
+-- rows outside the premade months if the task falls behind.
+--
+-- Existing rows are copied into the new tables, which then take over the
+-- original names; the old tables are kept as *_unpartitioned for rollback
+-- until dropped by hand. Stop Celery workers while this runs. Requires
+-- PostgreSQL 15+.
+
+BEGIN;
+
+-- Monthly partitions from the oldest row's month to three months ahead
+CREATE FUNCTION pg_temp.create_month_partitions(parent text, ts_column text) RETURNS void AS $$
+DECLARE
+    first_month date;
+    month date;
+BEGIN
+    EXECUTE format('SELECT date_trunc(''month'', min(%I))::date FROM %I', ts_column, parent)
+        INTO first_month;
+    first_month := coalesce(first_month, date_trunc('month', now())::date);
+
+    FOR month IN
+        SELECT generate_series(first_month, date_trunc('month', now())::date + interval '3 months', interval '1 month')::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            parent || '_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+            parent || '_partitioned', month, (month + interval '1 month')::date
+        );
+    END LOOP;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent || '_partitioned');
+END $$ LANGUAGE plpgsql;
+
+
+CREATE TABLE search_alerts_partitioned (
+    LIKE search_alerts INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id, sent_at),
+    FOREIGN KEY (saved_search_id) REFERENCES saved_searches (id) ON DELETE CASCADE
+) PARTITION BY RANGE (sent_at);
+
+CREATE TABLE audience_sync_history_partitioned (
+    LIKE audience_sync_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+    PRIMARY KEY (id, started_at),
+    FOREIGN KEY (audience_id) REFERENCES customer_match_audiences (id) ON DELETE CASCADE
+) PARTITION BY RANGE (started_at);
+
+SELECT pg_temp.create_month_partitions('search_alerts', 'sent_at');
+SELECT pg_temp.create_month_partitions('audience_sync_history', 'started_at');
+
+INSERT INTO search_alerts_partitioned SELECT * FROM search_alerts;
+INSERT INTO audience_sync_history_partitioned SELECT * FROM audience_sync_history;
+
+
+-- Swap, freeing index and constraint names for the new tables
+
+DROP INDEX IF EXISTS ix_search_alerts_saved_search_id;
+DROP INDEX IF EXISTS idx_search_alerts_search_sent;
+DROP INDEX IF EXISTS ix_audience_sync_history_audience_id;
+
+ALTER TABLE search_alerts RENAME TO search_alerts_unpartitioned;
+ALTER TABLE search_alerts_unpartitioned RENAME CONSTRAINT search_alerts_pkey TO search_alerts_unpartitioned_pkey;
+ALTER TABLE search_alerts_partitioned RENAME TO search_alerts;
+ALTER TABLE search_alerts RENAME CONSTRAINT search_alerts_partitioned_pkey TO search_alerts_pkey;
+
+ALTER TABLE audience_sync_history RENAME TO audience_sync_history_unpartitioned;
+ALTER TABLE audience_sync_history_unpartitioned RENAME CONSTRAINT audience_sync_history_pkey TO audience_sync_history_unpartitioned_pkey;
+ALTER TABLE audience_sync_history_partitioned RENAME TO audience_sync_history;
+ALTER TABLE audience_sync_history RENAME CONSTRAINT audience_sync_history_partitioned_pkey TO audience_sync_history_pkey;
+
+
+-- Indexes, cascaded to every partition
+
+CREATE INDEX ix_search_alerts_saved_search_id ON search_alerts (saved_search_id);
+CREATE INDEX idx_search_alerts_search_sent ON search_alerts (saved_search_id, sent_at DESC);
+CREATE INDEX ix_audience_sync_history_audience_id ON audience_sync_history (audience_id, started_at DESC);
+
+COMMIT;
+
+ANALYZE search_alerts;
+ANALYZE audience_sync_history;
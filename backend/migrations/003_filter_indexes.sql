@@ -0,0 +1,73 @@
+-- Composite and partial indexes for the filters search, alerts and audience syncs use
+--
+-- Generated by scripts/index_advisor.py; regenerate rather than edit. Run
+-- with psql outside a transaction (CONCURRENTLY can't run in one). Indexes
+-- on the partitioned tables are built on every partition; state is their
+-- partition key, so it is left out of the columns.
+
+-- serves 1 query shape
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_customer_match_audiences_next_sync_at_partial
+ON customer_match_audiences (next_sync_at)
+WHERE auto_sync_enabled;
+
+-- serves 6 query shapes
+CREATE INDEX IF NOT EXISTS ix_drivewaypro_analyses_condition
+ON drivewaypro_analyses (condition);
+
+-- serves 3 query shapes
+CREATE INDEX IF NOT EXISTS ix_drivewaypro_analyses_property_id_partial
+ON drivewaypro_analyses (property_id)
+WHERE sealing_recommended;
+
+-- serves 6 query shapes
+CREATE INDEX IF NOT EXISTS ix_permitscope_analyses_last_permit_date
+ON permitscope_analyses (last_permit_date);
+
+-- serves 3 query shapes
+CREATE INDEX IF NOT EXISTS ix_permitscope_analyses_construction_activity_score
+ON permitscope_analyses (construction_activity_score);
+
+-- serves 3 query shapes
+CREATE INDEX IF NOT EXISTS ix_permitscope_analyses_recent_permits_gin
+ON permitscope_analyses USING gin (recent_permits jsonb_path_ops);
+
+-- serves 20 query shapes
+CREATE INDEX IF NOT EXISTS ix_properties_updated_at
+ON properties (updated_at);
+
+-- serves 5 query shapes
+CREATE INDEX IF NOT EXISTS ix_properties_property_type_updated_at
+ON properties (property_type, updated_at);
+
+-- serves 5 query shapes
+CREATE INDEX IF NOT EXISTS ix_properties_zip_updated_at
+ON properties (zip, updated_at);
+
+-- serves 5 query shapes
+CREATE INDEX IF NOT EXISTS ix_properties_longitude
+ON properties (longitude);
+
+-- serves 2 query shapes
+CREATE INDEX IF NOT EXISTS ix_properties_city_updated_at
+ON properties (city, updated_at);
+
+-- serves 20 query shapes
+CREATE INDEX IF NOT EXISTS ix_roofiq_analyses_age_years
+ON roofiq_analyses (age_years);
+
+-- serves 6 query shapes
+CREATE INDEX IF NOT EXISTS ix_roofiq_analyses_condition_age_years
+ON roofiq_analyses (condition, age_years);
+
+-- serves 3 query shapes
+CREATE INDEX IF NOT EXISTS ix_roofiq_analyses_material_age_years
+ON roofiq_analyses (material, age_years);
+
+-- serves 3 query shapes
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_saved_searches_alert_frequency_alert_time_alert_day_partial
+ON saved_searches (alert_frequency, alert_time, alert_day)
+WHERE alerts_enabled AND is_active;
+
+-- serves 3 query shapes
+CREATE INDEX IF NOT EXISTS ix_solarfit_analyses_roi_years
+ON solarfit_analyses (roi_years);
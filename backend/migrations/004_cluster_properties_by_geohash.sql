@@ -0,0 +1,19 @@
+-- Store properties in geohash order of their centroid
+--
+-- Viewport and territory queries read properties that are near each other;
+-- with rows in insertion order each match tends to sit on its own heap page.
+-- Rewriting every partition in geohash (Z-order) order puts nearby properties
+-- on the same pages, so a bounding box reads a few pages instead of one per row.
+--
+-- CLUSTER takes an exclusive lock on each partition while it is rewritten;
+-- run off-peak. New and updated rows are appended out of order, and the weekly
+-- recluster_properties task rewrites partitions once they drift (see
+-- PROPERTY_CLUSTER_MIN_CORRELATION). Run with psql outside a transaction
+-- (CLUSTER on a partitioned table can't run in one). Requires PostgreSQL 15+.
+
+CREATE INDEX IF NOT EXISTS ix_properties_geohash
+ON properties ((ST_GeoHash(ST_Centroid(geometry), 10) COLLATE "C"));
+
+CLUSTER properties USING ix_properties_geohash;
+
+ANALYZE properties;
@@ -0,0 +1,27 @@
+-- Store property coordinates as double precision, with a geography point
+--
+-- latitude/longitude were DECIMAL(10,8)/DECIMAL(11,8), which the driver hands
+-- back as Python Decimals that every search converted to float. Doubles
+-- come back as floats and are exact to well under a millimetre. location is a
+-- generated geography(Point) of the same coordinates, GiST-indexed, for
+-- distance queries in meters (ST_DWithin, ST_Distance).
+--
+-- Each statement rewrites every properties partition under an exclusive
+-- lock; stop writers and run off-peak. The rewrite keeps the geohash order
+-- from 004.
+
+BEGIN;
+
+ALTER TABLE properties
+    ALTER COLUMN latitude TYPE double precision,
+    ALTER COLUMN longitude TYPE double precision;
+
+ALTER TABLE properties
+    ADD COLUMN location geography(Point, 4326)
+    GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED;
+
+CREATE INDEX idx_properties_location ON properties USING GIST (location);
+
+COMMIT;
+
+ANALYZE properties;
@@ -0,0 +1,108 @@
+-- Keep one latest analysis per property, with every version in analysis_history
+--
+-- The analysis tables become "latest" tables: a unique (property_id,
+-- property_state) constraint keeps one row per property, which is what
+-- searches and detail reads join. analysis_history is append-only and gets a
+-- snapshot of every version (app/core/analysis_history.py writes them on
+-- each flush), so reads stay the same size as history grows.
+--
+-- Existing rows are all copied into history, numbered per property from the
+-- oldest analysis_date; only the newest stays in its analysis table. Stop
+-- analysis writers while this runs.
+
+BEGIN;
+
+CREATE TABLE analysis_history (
+    id uuid NOT NULL,
+    property_id uuid NOT NULL,
+    property_state varchar(2) NOT NULL,
+    product varchar(20) NOT NULL,
+    analysis_id uuid NOT NULL,
+    version integer NOT NULL,
+    analysis_date timestamp,
+    data jsonb NOT NULL,
+    recorded_at timestamp NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, property_state),
+    FOREIGN KEY (property_id, property_state) REFERENCES properties (id, state) ON UPDATE CASCADE
+) PARTITION BY LIST (property_state);
+
+-- Same partitions as properties (001)
+DO $$
+DECLARE
+    code text;
+BEGIN
+    FOREACH code IN ARRAY ARRAY[
+        'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+        'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+        'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+        'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+        'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+        'DC', 'PR', 'VI', 'GU', 'AS', 'MP'
+    ] LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF analysis_history FOR VALUES IN (%L)',
+            'analysis_history_' || lower(code), code
+        );
+    END LOOP;
+    CREATE TABLE analysis_history_default PARTITION OF analysis_history DEFAULT;
+END $$;
+
+CREATE INDEX ix_analysis_history_property ON analysis_history (property_id, product, version);
+
+
+DO $$
+DECLARE
+    tbl text;
+    product text;
+BEGIN
+    FOR tbl, product IN
+        SELECT * FROM (VALUES
+            ('roofiq_analyses', 'roofiq'),
+            ('solarfit_analyses', 'solarfit'),
+            ('drivewaypro_analyses', 'drivewaypro'),
+            ('permitscope_analyses', 'permitscope')
+        ) AS analyses (tbl, product)
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD COLUMN version integer NOT NULL DEFAULT 1', tbl);
+
+        -- Every existing row becomes a version, oldest first
+        EXECUTE format($sql$
+            INSERT INTO analysis_history
+                (id, property_id, property_state, product, analysis_id, version, analysis_date, data, recorded_at)
+            SELECT gen_random_uuid(), a.property_id, a.property_state, %L, a.id,
+                   row_number() OVER (PARTITION BY a.property_id, a.property_state
+                                      ORDER BY a.analysis_date NULLS FIRST, a.id),
+                   a.analysis_date,
+                   to_jsonb(a) - 'id' - 'property_id' - 'property_state' - 'version',
+                   coalesce(a.analysis_date, now())
+            FROM %I a
+        $sql$, product, tbl);
+
+        -- Only the newest version of each property stays
+        EXECUTE format($sql$
+            DELETE FROM %I a
+            USING analysis_history h, analysis_history newer
+            WHERE h.product = %L AND h.analysis_id = a.id AND h.property_state = a.property_state
+              AND newer.product = h.product AND newer.property_id = h.property_id
+              AND newer.property_state = h.property_state AND newer.version > h.version
+        $sql$, tbl, product);
+
+        EXECUTE format($sql$
+            UPDATE %I a SET version = h.version
+            FROM analysis_history h
+            WHERE h.product = %L AND h.analysis_id = a.id AND h.property_state = a.property_state
+        $sql$, tbl, product);
+
+        EXECUTE format('ALTER TABLE %I ADD UNIQUE (property_id, property_state)', tbl);
+        -- The unique index leads with property_id
+        EXECUTE format('DROP INDEX IF EXISTS %I', 'ix_' || tbl || '_property_id');
+    END LOOP;
+END $$;
+
+COMMIT;
+
+ANALYZE analysis_history;
+ANALYZE roofiq_analyses;
+ANALYZE solarfit_analyses;
+ANALYZE drivewaypro_analyses;
+ANALYZE permitscope_analyses;
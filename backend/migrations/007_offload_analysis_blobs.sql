@@ -0,0 +1,33 @@
+-- Keep the wide analysis JSONB out of the rows searches read
+--
+-- solarfit_analyses.panel_layout (a GeoJSON MultiPolygon) and
+-- permitscope_analyses.recent_permits are deferred in the models: searches
+-- no longer select them, and only the detail view, the per-product
+-- endpoints and searches with include= load them. Here they are stored
+-- lz4-compressed (faster to decompress than the default pglz), and rows
+-- long enough to be TOASTed are shrunk to 128 bytes rather than ~2 kB, so
+-- their wide values all move out of line and the heap pages searches scan
+-- hold more rows. The GIN index on recent_permits is unaffected.
+--
+-- Both settings apply to values written from now on; existing values move
+-- as their properties are re-analysed.
+
+BEGIN;
+
+ALTER TABLE solarfit_analyses ALTER COLUMN panel_layout SET COMPRESSION lz4;
+ALTER TABLE permitscope_analyses ALTER COLUMN recent_permits SET COMPRESSION lz4;
+
+-- Storage parameters are set per partition; partitioned tables have none
+DO $$
+DECLARE
+    part regclass;
+BEGIN
+    FOR part IN
+        SELECT inhrelid::regclass FROM pg_inherits
+        WHERE inhparent IN ('solarfit_analyses'::regclass, 'permitscope_analyses'::regclass)
+    LOOP
+        EXECUTE format('ALTER TABLE %s SET (toast_tuple_target = 128)', part);
+    END LOOP;
+END $$;
+
+COMMIT;
@@ -0,0 +1,72 @@
+-- Precomputed per-region property summaries
+--
+-- region_aggregates holds one row of counts and sums per (state, county,
+-- city, zip), so county, city and zip summaries are a SUM over a few rows
+-- instead of a scan of properties and every analysis table. Missing county,
+-- city or zip values are ''. Property and analysis writes queue their
+-- regions in region_refresh_queue (app/core/region_aggregates.py); the
+-- refresh_region_aggregates task recomputes the queued regions every minute
+-- and rebuild_region_aggregates recomputes everything nightly.
+--
+-- The initial fill reads every property once; recent_permit_count uses the
+-- default REGION_RECENT_PERMIT_DAYS (90).
+
+BEGIN;
+
+CREATE TABLE region_aggregates (
+    state varchar(2) NOT NULL,
+    county varchar NOT NULL DEFAULT '',
+    city varchar NOT NULL DEFAULT '',
+    zip varchar(10) NOT NULL DEFAULT '',
+    property_count integer NOT NULL DEFAULT 0,
+    solar_count integer NOT NULL DEFAULT 0,
+    solar_score_sum bigint NOT NULL DEFAULT 0,
+    roof_excellent integer NOT NULL DEFAULT 0,
+    roof_good integer NOT NULL DEFAULT 0,
+    roof_fair integer NOT NULL DEFAULT 0,
+    roof_poor integer NOT NULL DEFAULT 0,
+    permit_count integer NOT NULL DEFAULT 0,
+    total_permits bigint NOT NULL DEFAULT 0,
+    recent_permit_count integer NOT NULL DEFAULT 0,
+    construction_activity_count integer NOT NULL DEFAULT 0,
+    construction_activity_sum bigint NOT NULL DEFAULT 0,
+    refreshed_at timestamp NOT NULL,
+    PRIMARY KEY (state, county, city, zip)
+);
+
+CREATE TABLE region_refresh_queue (
+    id bigserial PRIMARY KEY,
+    state varchar(2) NOT NULL,
+    county varchar NOT NULL DEFAULT '',
+    city varchar NOT NULL DEFAULT '',
+    zip varchar(10) NOT NULL DEFAULT '',
+    queued_at timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+INSERT INTO region_aggregates
+SELECT p.state,
+       coalesce(p.county, ''),
+       coalesce(p.city, ''),
+       coalesce(p.zip, ''),
+       count(*),
+       count(s.id),
+       coalesce(sum(s.score), 0),
+       count(*) FILTER (WHERE r.condition = 'EXCELLENT'),
+       count(*) FILTER (WHERE r.condition = 'GOOD'),
+       count(*) FILTER (WHERE r.condition = 'FAIR'),
+       count(*) FILTER (WHERE r.condition = 'POOR'),
+       count(ps.id),
+       coalesce(sum(ps.total_permits), 0),
+       count(*) FILTER (WHERE ps.last_permit_date >= current_date - 90),
+       count(ps.construction_activity_score),
+       coalesce(sum(ps.construction_activity_score), 0),
+       now() AT TIME ZONE 'utc'
+FROM properties p
+LEFT JOIN solarfit_analyses s ON s.property_id = p.id AND s.property_state = p.state
+LEFT JOIN roofiq_analyses r ON r.property_id = p.id AND r.property_state = p.state
+LEFT JOIN permitscope_analyses ps ON ps.property_id = p.id AND ps.property_state = p.state
+GROUP BY 1, 2, 3, 4;
+
+COMMIT;
+
+ANALYZE region_aggregates;
@@ -0,0 +1,123 @@
+"""
+Benchmark buffer reads of typical bounding-box queries.
+
+Runs EXPLAIN (ANALYZE, BUFFERS) for viewport searches (the search API's bounds
+filter) and territory-style geometry intersections around randomly chosen
+properties, and reports the shared buffers (8 kB pages, hit or read) each
+touches. With --recluster it measures, rewrites every property partition in
+geohash order (as the recluster_properties task does) and measures the same
+boxes again.
+
+    python scripts/benchmark_bbox_buffers.py --queries 50
+    python scripts/benchmark_bbox_buffers.py --queries 50 --recluster
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from pathlib import Path
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+# `python scripts/<name>.py` only puts scripts/ on sys.path; add backend/ for app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import AsyncSessionLocal, engine  # noqa: E402
+from app.models.property import Property  # noqa: E402
+from app.schemas.property import PropertyFilters  # noqa: E402
+from app.services.property_search import property_search_service  # noqa: E402
+from app.tasks.maintenance_tasks import cluster_candidates, cluster_partition  # noqa: E402
+
+# Box sizes in degrees: a few streets, a neighbourhood
+BOX_SIZES = [0.01, 0.05]
+
+
+def _queries(west: float, south: float, east: float, north: float) -> dict:
+    search = property_search_service.build_query(PropertyFilters(bounds=[west, south, east, north]))
+    territory = select(func.count(Property.id)).where(
+        func.ST_Intersects(Property.geometry, func.ST_MakeEnvelope(west, south, east, north, 4326))
+    )
+    return {
+        "search": search.limit(settings.CACHE_SEARCH_RESULT_MAX_IDS + 1),
+        "territory": territory,
+    }
+
+
+async def sample_centers(conn, n: int) -> list[tuple[float, float]]:
+    """Centroids of n random properties (the same ones on every run)"""
+    await conn.execute(text("SELECT setseed(0.5)"))
+    result = await conn.execute(text(
+        "SELECT ST_X(c), ST_Y(c) FROM ("
+        "  SELECT ST_Centroid(geometry) AS c FROM properties ORDER BY random() LIMIT :n"
+        ") sample"
+    ), {"n": n})
+    return [(x, y) for x, y in result]
+
+
+async def measure(conn, centers: list[tuple[float, float]]) -> dict:
+    """Buffers and execution time per query kind and box size"""
+    results = {}
+    for size in BOX_SIZES:
+        for x, y in centers:
+            half = size / 2
+            for kind, query in _queries(x - half, y - half, x + half, y + half).items():
+                sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+                result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+                plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                top = plan[0]["Plan"]
+                buffers = top["Shared Hit Blocks"] + top["Shared Read Blocks"]
+                samples = results.setdefault((kind, size), {"buffers": [], "ms": []})
+                samples["buffers"].append(buffers)
+                samples["ms"].append(plan[0]["Execution Time"])
+    return results
+
+
+def report(label: str, results: dict):
+    print(label)
+    for (kind, size), samples in results.items():
+        buffers = sorted(samples["buffers"])
+        p95 = buffers[max(int(len(buffers) * 0.95) - 1, 0)]
+        print(f"  {kind:<10} {size:>5}°  buffers mean {statistics.mean(buffers):8.1f}  "
+              f"p50 {statistics.median(buffers):7.0f}  p95 {p95:7.0f}  "
+              f"time mean {statistics.mean(samples['ms']):7.2f} ms")
+
+
+async def recluster():
+    async with AsyncSessionLocal() as session:
+        candidates = await cluster_candidates(session)
+    for candidate in candidates:
+        async with AsyncSessionLocal() as session:
+            await cluster_partition(session, candidate["partition"], candidate["index"])
+            await session.commit()
+    print(f"Clustered {len(candidates)} partitions")
+
+
+async def main(queries: int, reclustered: bool):
+    async with engine.connect() as conn:
+        centers = await sample_centers(conn, queries)
+        before = await measure(conn, centers)
+    report(f"{len(centers)} boxes per size", before)
+
+    if reclustered:
+        await recluster()
+        async with engine.connect() as conn:
+            after = await measure(conn, centers)
+        report("after clustering", after)
+        for key, samples in before.items():
+            ratio = statistics.mean(after[key]["buffers"]) / max(statistics.mean(samples["buffers"]), 1)
+            print(f"  {key[0]} {key[1]}°: {ratio:.0%} of the buffers")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--recluster", action="store_true", help="cluster every partition and measure again")
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.recluster))
@@ -0,0 +1,100 @@
+"""
+Benchmark loading search result pages with and without the wide analysis fields.
+
+Loads pages of random properties from the database the way a search cache
+miss does (property_search_service.load_payloads) twice: as search results,
+without panel_layout and recent_permits, and with every include field, as
+the detail view and include= searches do. Reports time and encoded size per
+page, plus how much of each analysis table is heap and how much TOAST.
+
+    python scripts/benchmark_search_payloads.py --pages 20 --limit 100
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+# `python scripts/<name>.py` only puts scripts/ on sys.path; add backend/ for app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.database import AsyncSessionLocal, engine  # noqa: E402
+from app.services.property_search import INCLUDE_COLUMNS, property_search_service  # noqa: E402
+
+TABLES = ["solarfit_analyses", "permitscope_analyses"]
+
+
+async def sample_pages(session, pages: int, limit: int) -> list[list[str]]:
+    """Pages of random property ids with analyses (the same ones on every run)"""
+    await session.execute(text("SELECT setseed(0.5)"))
+    result = await session.execute(text(
+        "SELECT property_id FROM solarfit_analyses ORDER BY random() LIMIT :n"
+    ), {"n": pages * limit})
+    ids = [str(row[0]) for row in result]
+    return [ids[i:i + limit] for i in range(0, len(ids), limit)]
+
+
+async def measure(pages: list[list[str]], include) -> dict:
+    """Milliseconds and encoded bytes per page"""
+    samples = {"ms": [], "bytes": []}
+    for page in pages:
+        # A fresh session per page, so nothing comes from the identity map
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            bodies = await property_search_service.load_payloads(session, page, include)
+            samples["ms"].append((time.perf_counter() - started) * 1000)
+            samples["bytes"].append(sum(len(body) for body in bodies.values()))
+    return samples
+
+
+async def table_sizes(session) -> dict:
+    """Heap and TOAST bytes of each analysis table, summed over its partitions"""
+    sizes = {}
+    for table in TABLES:
+        result = await session.execute(text(
+            "SELECT sum(pg_relation_size(relid)), sum(pg_table_size(relid) - pg_relation_size(relid)) "
+            "FROM pg_partition_tree(:table)"
+        ), {"table": table})
+        heap, toast = result.one()
+        sizes[table] = (heap or 0, toast or 0)
+    return sizes
+
+
+def report(label: str, samples: dict):
+    ms = sorted(samples["ms"])
+    p95 = ms[max(int(len(ms) * 0.95) - 1, 0)]
+    print(f"  {label:<8} time mean {statistics.mean(ms):7.2f} ms  p50 {statistics.median(ms):7.2f}  "
+          f"p95 {p95:7.2f}  size mean {statistics.mean(samples['bytes']) / 1024:8.1f} kB")
+
+
+async def main(pages: int, limit: int):
+    async with AsyncSessionLocal() as session:
+        sampled = await sample_pages(session, pages, limit)
+        sizes = await table_sizes(session)
+
+    for table, (heap, toast) in sizes.items():
+        print(f"{table}: heap {heap / 2**20:.1f} MB, TOAST {toast / 2**20:.1f} MB")
+
+    # Warm up the pool and caches so the first measured run isn't penalised
+    await measure(sampled[:1], INCLUDE_COLUMNS)
+
+    print(f"{len(sampled)} pages of {limit}")
+    summary = await measure(sampled, ())
+    full = await measure(sampled, INCLUDE_COLUMNS)
+    report("search", summary)
+    report("include", full)
+    ratio = statistics.mean(summary["ms"]) / max(statistics.mean(full["ms"]), 0.001)
+    print(f"  search pages take {ratio:.0%} of the time")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.limit))
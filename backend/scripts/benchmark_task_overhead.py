@@ -0,0 +1,74 @@
+"""
+Benchmark per-task overhead of running Celery task bodies.
+
+Compares the old pattern, asyncio.run() per task (a new event loop, so every
+task opens fresh database connections), with run_async() on the worker's
+long-lived loop, where pooled connections are reused. Each task runs one
+trivial query, so the difference is the per-task setup cost.
+
+    python scripts/benchmark_task_overhead.py --tasks 200
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+# `python scripts/<name>.py` only puts scripts/ on sys.path; add backend/ for app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.database import AsyncSessionLocal, engine  # noqa: E402
+from app.tasks.event_loop import get_loop, run_async  # noqa: E402
+
+
+async def task_body():
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+
+
+async def task_body_new_loop():
+    # Connections can't outlive the loop that opened them
+    try:
+        await task_body()
+    finally:
+        await engine.dispose()
+
+
+def measure(run, tasks: int) -> list[float]:
+    timings = []
+    for _ in range(tasks):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} mean {statistics.mean(timings):7.2f} ms   "
+          f"p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main(tasks: int):
+    before = measure(lambda: asyncio.run(task_body_new_loop()), tasks)
+
+    # Warm the pool once, as a worker would after its first task
+    run_async(task_body())
+    after = measure(lambda: run_async(task_body()), tasks)
+    get_loop().run_until_complete(engine.dispose())
+
+    print(f"{tasks} tasks, one query each")
+    report("asyncio.run per task", before)
+    report("persistent worker loop", after)
+    print(f"saved per task: {statistics.mean(before) - statistics.mean(after):.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=200)
+    args = parser.parse_args()
+    main(args.tasks)
@@ -0,0 +1,59 @@
+"""
+Check cache sharding against the configured Redis nodes.
+
+Writes sample keys through CacheService, reads them back, reports how they
+spread over REDIS_URLS and how many would move if another node were added.
+
+    REDIS_URLS='["redis://localhost:6379/0","redis://localhost:6380/0"]' \
+        python scripts/check_cache_sharding.py --keys 10000
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from pathlib import Path
+
+# `python scripts/<name>.py` only puts scripts/ on sys.path; add backend/ for app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.cache import cache  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.sharding import HashRing  # noqa: E402
+
+PREFIX = "shard_check"
+
+
+async def main(key_count: int, extra_node: str):
+    await cache.connect()
+    try:
+        urls = settings.REDIS_URLS or [settings.REDIS_URL]
+        keys = [f"{PREFIX}:{i}" for i in range(key_count)]
+
+        await cache.mset_with_ttl({key: i for i, key in enumerate(keys)}, 300)
+        values = await cache.mget(keys)
+        missing = sum(value is None for value in values)
+
+        placement = Counter(cache.ring.get_node(key) for key in keys)
+        for index, url in enumerate(urls):
+            stored = 0
+            async for _ in cache.nodes[index].scan_iter(match=f"{PREFIX}:*", count=1000):
+                stored += 1
+            print(f"{url}: {placement[index]} keys ({placement[index] / key_count:.1%}), {stored} stored")
+        print(f"read back: {key_count - missing}/{key_count}")
+
+        grown = HashRing(urls + [extra_node])
+        moved = sum(cache.ring.get_node(key) != grown.get_node(key) for key in keys)
+        print(f"adding {extra_node} moves {moved / key_count:.1%} of keys "
+              f"(ideal {1 / (len(urls) + 1):.1%})")
+
+        await cache.clear_pattern(f"{PREFIX}:*")
+    finally:
+        await cache.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--extra-node", default="redis://localhost:6399/0")
+    args = parser.parse_args()
+    asyncio.run(main(args.keys, args.extra_node))
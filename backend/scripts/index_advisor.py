@@ -0,0 +1,576 @@
+"""
+Derive the indexes our filters need from the queries the code emits.
+
+Builds the property queries that search (build_query), saved-search alerts
+and audience syncs (stored_filter_conditions) produce for a catalogue of
+filter sets, plus the alert and audience scheduling queries, and reads the
+columns each one filters and sorts on. Every query shape gets one index:
+
+    equality columns, then the first range column, else the sort column
+
+Boolean flags compared with true or false become a partial index predicate
+(keyed on the table's join column when nothing else is filtered), and JSONB
+containment (@>) gets a GIN index with jsonb_path_ops. The LIST
+partition key (state) is left out: a state predicate prunes properties and the
+analysis tables to one partition, so indexes only need to order rows within it.
+
+    python scripts/index_advisor.py                 # shapes and recommended indexes
+    python scripts/index_advisor.py --write migrations/003_filter_indexes.sql
+    python scripts/index_advisor.py --check alembic_migration_indexes.sql migrations/003_filter_indexes.sql
+    python scripts/index_advisor.py --explain --usage   # plan every shape on DATABASE_URL
+
+--check fails on indexes over tables or columns the models don't have and on
+recommendations no migration or model covers. --explain also checks the
+referenced columns and recommended indexes against the live schema, and
+--usage adds the filter sets stored on saved searches and audiences.
+"""
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+from sqlalchemy import JSON, Boolean, and_, cast, literal, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql.operators import CONTAINS
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, False_, Label, True_, UnaryExpression
+from sqlalchemy.sql.schema import Column
+
+# `python scripts/<name>.py` only puts scripts/ on sys.path; add backend/ for app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.database import Base, engine  # noqa: E402
+from app.models import territory  # noqa: E402, F401 (registers its tables for --check)
+from app.models.google_ads import CustomerMatchAudience  # noqa: E402
+from app.models.property import Property  # noqa: E402
+from app.models.saved_search import AlertFrequency, SavedSearch  # noqa: E402
+from app.schemas.property import PropertyFilters  # noqa: E402
+from app.services.property_search import property_search_service  # noqa: E402
+
+# Filter sets the search API is used with, each run with every sort order
+SEARCH_FILTERS = [
+    {},
+    {"state": "TX"},
+    {"state": "TX", "property_type": "residential"},
+    {"state": "TX", "city": "Austin"},
+    {"zip": "78701"},
+    {"county": "Travis"},
+    {"bounds": [-97.8, 30.2, -97.6, 30.4]},
+    {"state": "TX", "roof_condition": ["poor", "fair"]},
+    {"state": "TX", "roof_condition": ["poor"], "roof_age_years_min": 15},
+    {"roof_age_years_min": 20},
+    {"roof_material": ["asphalt"]},
+    {"state": "TX", "solar_score_min": 70},
+    {"solar_score_min": 70, "panel_count_min": 20},
+    {"roi_years_max": 8},
+    {"state": "TX", "permit_activity_days": 90},
+    {"permit_activity_days": 30, "construction_activity_min": 60},
+    {"construction_activity_min": 60},
+    {"state": "TX", "permit_types": ["roofing", "electrical"]},
+    {"state": "TX", "driveway_condition": ["poor", "fair"]},
+    {"state": "TX", "driveway_sealing_recommended": True},
+    {"driveway_condition": ["poor"], "driveway_sealing_recommended": True},
+]
+SEARCH_SORTS = [
+    {},
+    {"sort_by": "solar_score", "sort_order": "desc"},
+    {"sort_by": "roof_age", "sort_order": "desc"},
+]
+
+# Filter dicts as stored on saved searches and audiences
+STORED_FILTERS = [
+    {},
+    {"state": "TX"},
+    {"state": "TX", "city": "Austin"},
+    {"state": "TX", "property_type": ["residential"]},
+    {"zip": "78701"},
+    {"bounds": [-97.8, 30.2, -97.6, 30.4]},
+]
+
+# Stands in for SavedSearch.last_checked_at and the scheduler's clock
+NOW = datetime(2026, 1, 1, 9)
+
+# Postgres truncates identifiers longer than this
+MAX_NAME_LENGTH = 63
+
+CREATE_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+"
+    r"ON\s+(?:ONLY\s+)?(\w+)\s*(?:USING\s+(\w+)\s*)?\((.*?)\)\s*(?:WHERE\s+(.*?))?;",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class IndexSpec:
+    """A (possibly partial) index on columns of one table, b-tree unless using says otherwise"""
+
+    def __init__(
+        self,
+        table: str,
+        columns: list[str],
+        where: list[str] = (),
+        name: str = None,
+        using: str = "btree",
+        opclass: str = None,
+    ):
+        self.table = table
+        self.columns = list(columns)
+        self.where = sorted(where)
+        self.using = using.lower()
+        self.opclass = opclass
+        self.name = name or self._default_name()
+
+    def _default_name(self) -> str:
+        name = f"ix_{self.table}_{'_'.join(self.columns)}"
+        if self.where:
+            name += "_partial"
+        if self.using != "btree":
+            name += f"_{self.using}"
+        return name[:MAX_NAME_LENGTH]
+
+    def covers(self, other: "IndexSpec") -> bool:
+        """Whether this index serves every lookup other would"""
+        return (
+            self.table == other.table
+            and self.using == other.using
+            and self.columns[:len(other.columns)] == other.columns
+            and set(self.where) <= set(other.where)
+        )
+
+    def sql(self) -> str:
+        table = Base.metadata.tables[self.table]
+        # CONCURRENTLY isn't supported on partitioned parents; the index is
+        # built on each partition while writes to the table wait
+        concurrently = "" if _partition_key(table) else "CONCURRENTLY "
+        using = "" if self.using == "btree" else f"USING {self.using} "
+        columns = [f"{c} {self.opclass}" if self.opclass else c for c in self.columns]
+        statement = (
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {self.name}\n"
+            f"ON {self.table} {using}({', '.join(columns)})"
+        )
+        if self.where:
+            statement += "\nWHERE " + " AND ".join(self.where)
+        return statement + ";"
+
+    def __str__(self):
+        where = f" WHERE {' AND '.join(self.where)}" if self.where else ""
+        using = "" if self.using == "btree" else f" USING {self.using}"
+        return f"{self.table}({', '.join(self.columns)}){using}{where}"
+
+
+class Shape:
+    """One query the code can emit, and the columns it uses per table"""
+
+    def __init__(self, source: str, label: str, query):
+        self.source = source
+        self.label = label
+        self.query = query
+        self.equality: dict[str, list[str]] = {}
+        self.range: dict[str, list[str]] = {}
+        self.flags: dict[str, list[str]] = {}
+        self.contains: dict[str, list[str]] = {}
+        self.text: list[str] = []
+        self.order = None
+        self._read_predicates()
+
+    def _add(self, groups: dict, column: Column, entry: str = None):
+        entries = groups.setdefault(column.table.name, [])
+        entry = entry or column.name
+        if entry not in entries:
+            entries.append(entry)
+
+    def _read_predicates(self):
+        if self.query.whereclause is not None:
+            for element in visitors.iterate(self.query.whereclause):
+                if not isinstance(element, BinaryExpression) or not isinstance(element.left, Column):
+                    continue
+                column, op = element.left, element.operator
+                if op is operators.eq and isinstance(element.right, (True_, False_)) and isinstance(column.type, Boolean):
+                    negated = isinstance(element.right, False_)
+                    self._add(self.flags, column, f"NOT {column.name}" if negated else column.name)
+                elif op in (operators.eq, operators.in_op):
+                    self._add(self.equality, column)
+                elif op in (operators.ge, operators.gt, operators.le, operators.lt):
+                    self._add(self.range, column)
+                elif op is CONTAINS:
+                    self._add(self.contains, column)
+                elif op in (operators.ilike_op, operators.like_op):
+                    self.text.append(f"{column.table.name}.{column.name}")
+
+        order_by = self.query._order_by_clauses
+        if order_by:
+            first = order_by[0]
+            if isinstance(first, (UnaryExpression, Label)):
+                first = first.element
+            if isinstance(first, Column):
+                self.order = first
+
+    def columns(self) -> set[tuple[str, str]]:
+        """(table, column) pairs the shape filters or sorts on"""
+        used = {
+            (table, name)
+            for groups in (self.equality, self.range, self.flags, self.contains)
+            for table, names in groups.items()
+            for name in names
+        }
+        used = {(table, re.sub(r"^NOT ", "", name)) for table, name in used}
+        used.update(tuple(name.split(".")) for name in self.text)
+        if self.order is not None:
+            used.add((self.order.table.name, self.order.name))
+        return used
+
+    def recommendations(self, rank: Counter = None) -> list[IndexSpec]:
+        """
+        One index per table: equality columns, then a range or the sort column.
+
+        Equality columns come most used (in rank) first, so an index built for
+        one shape has the others' equality columns as its prefix. Each JSONB
+        column tested for containment gets its own GIN index.
+        """
+        rank = rank or Counter()
+        tables = set(self.equality) | set(self.range) | set(self.flags)
+        if self.order is not None:
+            tables.add(self.order.table.name)
+
+        specs = []
+        for name in sorted(tables):
+            skip = _partition_key(Base.metadata.tables[name])
+            columns = [c for c in self.equality.get(name, []) if c != skip]
+            columns.sort(key=lambda c: -rank[(name, c)])
+            ranges = [c for c in self.range.get(name, []) if c not in columns]
+            if ranges:
+                columns.append(ranges[0])
+            elif self.order is not None and self.order.table.name == name and self.order.name not in columns:
+                columns.append(self.order.name)
+            if not columns and name in self.flags:
+                # A flag alone still narrows the join; key its partial index on the join column
+                columns = [_join_column(Base.metadata.tables[name])]
+            if columns and columns != ["id"]:
+                specs.append(IndexSpec(name, columns, self.flags.get(name, [])))
+
+        for name, columns in sorted(self.contains.items()):
+            for column in columns:
+                specs.append(IndexSpec(name, [column], using="gin", opclass="jsonb_path_ops"))
+        return specs
+
+    def sql(self) -> str:
+        def json_literal(element):
+            # JSON binds have no literal renderer; render them as text cast to their type
+            if isinstance(element, BindParameter) and isinstance(element.type, JSON):
+                return cast(literal(json.dumps(element.value)), element.type)
+
+        query = visitors.replacement_traverse(self.query, {}, json_literal)
+        compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        return str(compiled)
+
+
+def _partition_key(table):
+    """Column a table is LIST-partitioned on, if any"""
+    partition_by = table.dialect_options["postgresql"].get("partition_by") or ""
+    match = re.match(r"LIST\s*\((\w+)\)", partition_by, re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def _join_column(table):
+    """Leading column of a table's first foreign key, else of its primary key, minus the partition key"""
+    skip = _partition_key(table)
+    for key in sorted(table.foreign_key_constraints, key=lambda fk: fk.name or ""):
+        columns = [c.name for c in key.columns if c.name != skip]
+        if columns:
+            return columns[0]
+    return next(c.name for c in table.primary_key.columns if c.name != skip)
+
+
+def _alert_query(filters: dict):
+    """Mirror of _process_search_alert's property query"""
+    conditions = property_search_service.stored_filter_conditions(filters)
+    conditions.append(Property.updated_at > NOW)
+    return select(Property).options(
+        joinedload(Property.roofiq),
+        joinedload(Property.solarfit),
+        joinedload(Property.drivewaypro),
+        joinedload(Property.permitscope),
+    ).where(and_(*conditions))
+
+
+def _audience_query(filters: dict):
+    """Mirror of _sync_audience_to_google_ads's property query"""
+    conditions = property_search_service.stored_filter_conditions(filters)
+    query = select(Property).options(
+        joinedload(Property.roofiq),
+        joinedload(Property.solarfit),
+        joinedload(Property.drivewaypro),
+        joinedload(Property.permitscope),
+    )
+    if conditions:
+        query = query.where(and_(*conditions))
+    return query.limit(50000)
+
+
+def scheduler_shapes() -> list[Shape]:
+    """The alert and audience scheduling queries (alert_tasks, google_ads_tasks)"""
+    due = [SavedSearch.is_active == True, SavedSearch.alerts_enabled == True]
+    instant_searches = select(SavedSearch).where(
+        *due,
+        SavedSearch.alert_frequency == AlertFrequency.INSTANT,
+    )
+    daily_searches = select(SavedSearch).where(
+        *due,
+        SavedSearch.alert_frequency == AlertFrequency.DAILY,
+        SavedSearch.alert_time == NOW.hour,
+    )
+    weekly_searches = select(SavedSearch).where(
+        *due,
+        SavedSearch.alert_frequency == AlertFrequency.WEEKLY,
+        SavedSearch.alert_day == NOW.weekday(),
+        SavedSearch.alert_time == NOW.hour,
+    )
+    due_audiences = select(CustomerMatchAudience).where(
+        CustomerMatchAudience.auto_sync_enabled == True,
+        CustomerMatchAudience.next_sync_at <= NOW,
+    )
+    return [
+        Shape("alerts", "instant alert searches", instant_searches),
+        Shape("alerts", "daily alert searches due", daily_searches),
+        Shape("alerts", "weekly/monthly alert searches due", weekly_searches),
+        Shape("audiences", "audiences due for auto-sync", due_audiences),
+    ]
+
+
+def stored_filter_shapes(filters: dict) -> list[Shape]:
+    label = json.dumps(filters)
+    return [
+        Shape("alerts", label, _alert_query(filters)),
+        Shape("audiences", label, _audience_query(filters)),
+    ]
+
+
+def query_shapes(usage: list[dict] = ()) -> list[Shape]:
+    """Every query shape in the catalogue, plus stored filter sets in use"""
+    shapes = []
+    for filters in SEARCH_FILTERS:
+        for sort in SEARCH_SORTS:
+            params = {**filters, **sort}
+            query = property_search_service.build_query(PropertyFilters(**params))
+            shapes.append(Shape("search", json.dumps(params), query))
+
+    for filters in [*STORED_FILTERS, *usage]:
+        shapes.extend(stored_filter_shapes(filters))
+
+    shapes.extend(scheduler_shapes())
+    return shapes
+
+
+def equality_rank(shapes: list[Shape]) -> Counter:
+    """How many shapes test each (table, column) for equality"""
+    return Counter(
+        (table, column)
+        for shape in shapes
+        for table, columns in shape.equality.items()
+        for column in columns
+    )
+
+
+def recommend(shapes: list[Shape]) -> list[tuple[IndexSpec, int]]:
+    """Recommended indexes with the number of shapes each serves, minus those another covers"""
+    rank = equality_rank(shapes)
+    served = Counter()
+    specs = {}
+    for shape in shapes:
+        for spec in shape.recommendations(rank):
+            specs.setdefault(str(spec), spec)
+            served[str(spec)] += 1
+
+    kept = []
+    for key, spec in specs.items():
+        if any(other is not spec and other.covers(spec) for other in specs.values()):
+            continue
+        uses = sum(n for k, n in served.items() if spec.covers(specs[k]))
+        kept.append((spec, uses))
+    return sorted(kept, key=lambda item: (item[0].table, -item[1]))
+
+
+def model_indexes() -> list[IndexSpec]:
+    """Indexes declared on the models, including primary keys"""
+    specs = []
+    for table in Base.metadata.tables.values():
+        specs.append(IndexSpec(table.name, [c.name for c in table.primary_key.columns], name=f"{table.name}_pkey"))
+        for index in table.indexes:
+            using = index.dialect_options["postgresql"].get("using") or "btree"
+            specs.append(IndexSpec(table.name, [c.name for c in index.columns], name=index.name, using=using))
+    return specs
+
+
+def parse_indexes(sql: str) -> list[tuple[IndexSpec, list[str]]]:
+    """CREATE INDEX statements of a migration, with every column they reference"""
+    parsed = []
+    for name, table, method, columns, where in CREATE_INDEX_RE.findall(sql):
+        names = [re.split(r"\s+", c.strip())[0].strip('"') for c in columns.split(",")]
+        referenced = list(names)
+        flags = []
+        if where:
+            referenced += re.findall(r"([a-z_][a-z0-9_]*)\s*(?:=|<|>|\bIS\b)", where, re.IGNORECASE)
+            flags = [w.strip() for w in re.split(r"\s+AND\s+", where, flags=re.IGNORECASE)]
+            flags = [re.sub(r"\s*=\s*true$", "", f, flags=re.IGNORECASE) for f in flags]
+            flags = [re.sub(r"^(\w+)\s*=\s*false$", r"NOT \1", f, flags=re.IGNORECASE) for f in flags]
+        parsed.append((IndexSpec(table, names, flags, name=name, using=method or "btree"), referenced))
+    return parsed
+
+
+def check(paths: list[str], recommendations: list[tuple[IndexSpec, int]]) -> list[str]:
+    """Problems with the migrations at paths"""
+    problems = []
+    available = model_indexes()
+    for path in paths:
+        with open(path) as f:
+            sql = re.sub(r"--[^\n]*", "", f.read())
+        for spec, referenced in parse_indexes(sql):
+            table = Base.metadata.tables.get(spec.table)
+            if table is None:
+                problems.append(f"{path}: {spec.name} is on unknown table {spec.table}")
+                continue
+            missing = sorted({c for c in referenced if c not in table.columns})
+            if missing:
+                problems.append(f"{path}: {spec.name} references missing columns {spec.table}.{', '.join(missing)}")
+                continue
+            available.append(spec)
+
+    for spec, uses in recommendations:
+        if not any(index.covers(spec) for index in available):
+            problems.append(f"no index covers {spec} ({uses} query shapes)")
+    return problems
+
+
+def render_migration(recommendations: list[tuple[IndexSpec, int]]) -> str:
+    lines = [
+        "-- Composite and partial indexes for the filters search, alerts and audience syncs use",
+        "--",
+        "-- Generated by scripts/index_advisor.py; regenerate rather than edit. Run",
+        "-- with psql outside a transaction (CONCURRENTLY can't run in one). Indexes",
+        "-- on the partitioned tables are built on every partition; state is their",
+        "-- partition key, so it is left out of the columns.",
+        "",
+    ]
+    available = model_indexes()
+    for spec, uses in recommendations:
+        if any(index.covers(spec) for index in available):
+            continue
+        lines.append(f"-- serves {uses} query shape{'' if uses == 1 else 's'}")
+        lines.append(spec.sql())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+async def explain(shapes: list[Shape], recommendations: list[tuple[IndexSpec, int]]):
+    """Check columns and indexes against the live schema and plan every shape"""
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT table_name, column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema()"
+        ))
+        live_columns = {(row.table_name, row.column_name) for row in result}
+        result = await conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+        ))
+        live_indexes = {row.indexname for row in result}
+
+        used = set().union(*(shape.columns() for shape in shapes))
+        for table, column in sorted(used - live_columns):
+            print(f"MISSING COLUMN  {table}.{column} is queried but not in the database")
+
+        for spec, uses in recommendations:
+            state = "present" if spec.name in live_indexes else "missing"
+            print(f"{state:<8} {spec.name}  {spec} ({uses} shapes)")
+        print()
+
+        for shape in shapes:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {shape.sql()}")
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(_plan_nodes(plan[0]["Plan"]))
+            seq_scans = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"})
+            indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+            flag = "SEQ" if seq_scans else "ok "
+            print(f"{flag} [{shape.source}] {shape.label}")
+            print(f"      cost {plan[0]['Plan']['Total Cost']:.0f}"
+                  f"  seq scans: {', '.join(seq_scans) or '-'}  indexes: {', '.join(indexes) or '-'}")
+    await engine.dispose()
+
+
+async def stored_usage() -> list[dict]:
+    """Distinct filter sets on active saved searches and audiences"""
+    async with engine.connect() as conn:
+        searches = await conn.execute(select(SavedSearch.filters).where(SavedSearch.is_active == True))
+        audiences = await conn.execute(select(CustomerMatchAudience.property_filters))
+        rows = [*searches.scalars(), *audiences.scalars()]
+    unique = {json.dumps(filters, sort_keys=True): filters for filters in rows if filters}
+    return list(unique.values())
+
+
+def report(shapes: list[Shape], recommendations: list[tuple[IndexSpec, int]]):
+    print(f"{len(shapes)} query shapes")
+    rank = equality_rank(shapes)
+    for shape in shapes:
+        specs = "; ".join(str(spec) for spec in shape.recommendations(rank)) or "-"
+        print(f"  [{shape.source}] {shape.label}: {specs}")
+
+    text_columns = sorted({c for shape in shapes for c in shape.text})
+    if text_columns:
+        print(f"\nILIKE '%...%' on {', '.join(text_columns)} can't use a b-tree index (needs pg_trgm)")
+
+    available = model_indexes()
+    print("\nRecommended indexes")
+    for spec, uses in recommendations:
+        declared = next((index.name for index in available if index.covers(spec)), None)
+        note = f"declared: {declared}" if declared else "new"
+        print(f"  {str(spec):<70} {uses:>3} shapes  {note}")
+
+    redundant = [
+        index for index in available
+        if len(index.columns) == 1 and not index.name.endswith("_pkey")
+        and any(spec.covers(index) and spec.columns != index.columns for spec, _ in recommendations)
+    ]
+    for index in redundant:
+        print(f"  {index.name} is a prefix of a recommended index and can be dropped once it exists")
+
+
+def main(args):
+    usage = asyncio.run(stored_usage()) if args.usage else []
+    shapes = query_shapes(usage)
+    recommendations = recommend(shapes)
+
+    if args.write:
+        with open(args.write, "w") as f:
+            f.write(render_migration(recommendations))
+        print(f"Wrote {args.write}")
+    elif args.check:
+        problems = check(args.check, recommendations)
+        for problem in problems:
+            print(problem)
+        if problems:
+            sys.exit(1)
+        print(f"{len(recommendations)} recommended indexes covered")
+    elif args.explain:
+        asyncio.run(explain(shapes, recommendations))
+    else:
+        report(shapes, recommendations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--write", metavar="PATH", help="write a migration creating the recommended indexes")
+    parser.add_argument("--check", metavar="PATH", nargs="+", help="validate index migrations")
+    parser.add_argument("--explain", action="store_true", help="plan every shape on DATABASE_URL")
+    parser.add_argument("--usage", action="store_true", help="add filter sets stored in the database")
+    main(parser.parse_args())
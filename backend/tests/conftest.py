@@ -0,0 +1,35 @@
+import fakeredis
+import pytest
+
+from app.core.cache import CircuitBreaker, cache
+from app.core.config import settings
+from app.core.sharding import HashRing
+
+
+@pytest.fixture
+def fake_cache(monkeypatch):
+    """
+    Connect the global cache to in-memory Redis nodes.
+
+    Returns a function taking the node names, so tests can shard over
+    several nodes; the cache is disconnected again afterwards.
+    """
+    def connect(*urls: str):
+        cache.nodes = [fakeredis.FakeAsyncRedis(decode_responses=True) for _ in urls]
+        cache.breakers = [
+            CircuitBreaker(
+                failure_threshold=settings.CACHE_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CACHE_CIRCUIT_RESET_SECONDS,
+            )
+            for _ in urls
+        ]
+        cache.ring = HashRing(list(urls))
+        return cache
+
+    yield connect
+
+    cache.nodes = []
+    cache.breakers = []
+    cache.ring = None
+    cache.bypassed.clear()
+    cache.failed.clear()
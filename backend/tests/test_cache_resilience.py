@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.core.cache import CircuitBreaker
+
+
+def wait_out_cooldown(breaker: CircuitBreaker):
+    """Move the breaker's last opening back by its reset timeout"""
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_breaker_lets_one_probe_through_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    wait_out_cooldown(breaker)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    # The probe re-arms the cooldown, so concurrent callers keep bypassing
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_probe_outcome_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    wait_out_cooldown(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    wait_out_cooldown(breaker)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+async def test_failing_node_degrades_to_misses_then_bypasses(fake_cache):
+    cache = fake_cache("redis://a")
+    threshold = cache.breakers[0].failure_threshold
+
+    async def fail():
+        raise ConnectionError("down")
+
+    for _ in range(threshold):
+        assert await cache._call("get", fail, default="fallback") == "fallback"
+    assert cache.breakers[0].state == "open"
+    assert cache.failed["get"] == threshold
+
+    calls = []
+
+    async def record():
+        calls.append(1)
+
+    assert await cache._call("get", record, default="fallback") == "fallback"
+    assert not calls
+    assert cache.bypassed["get"] == 1
+
+
+async def test_slow_call_times_out(fake_cache):
+    cache = fake_cache("redis://a")
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    assert await cache._call("get", slow, default="fallback", timeout=0.01) == "fallback"
+    assert cache.failed["get"] == 1
@@ -48,7 +48,7 @@ export interface SolarFitData {
   confidence: number
   annual_kwh_potential: number
   panel_count: number
-  panel_layout: GeoJSON.MultiPolygon
+  panel_layout: GeoJSON.MultiPolygon | null // null in search results unless included
   system_size_kw: number
   estimated_cost: number
   annual_savings: number
@@ -77,7 +77,7 @@ export interface DrivewayProData {
 }
 
 export interface PermitScopeData {
-  recent_permits: Permit[]
+  recent_permits: Permit[] | null // null in search results unless included
   total_permits: number
   last_permit_date: string | null
   construction_activity_score: number // 0-100
@@ -126,6 +126,7 @@ export interface PropertyFilters {
   // PermitScope filters
   permit_activity_days?: number // recent permits within X days
   construction_activity_min?: number
+  permit_types?: string[] // any of these Permit.permit_type values
 
   // Pagination
   limit?: number
@@ -134,6 +135,9 @@ export interface PropertyFilters {
   // Sorting
   sort_by?: 'solar_score' | 'roof_age' | 'updated_at'
   sort_order?: 'asc' | 'desc'
+
+  // Wide analysis fields to return with each property
+  include?: ('panel_layout' | 'recent_permits')[]
 }
 
 export interface PropertySearchResponse {